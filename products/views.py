@@ -51,9 +51,22 @@ def delete_category(request, category_id):
 
 @api_view(['GET'])
 def list_products(request):
-    products = Product.objects.select_related('category').all()
-    serializer = ProductSerializer(products, many=True)
-    return Response(serializer.data)
+    # Camino rápido: proyección values() sin instanciar modelos. Cada valor pasa
+    # por el mismo campo de ProductSerializer, así la salida es idéntica.
+    fields = ProductSerializer().fields
+    columns = [(name, Product._meta.get_field(name).attname) for name in fields]
+    data = []
+    for row in Product.objects.values(*[attname for _, attname in columns]):
+        item = {}
+        for name, attname in columns:
+            value = row[attname]
+            # Las FK (category) se muestran como id, igual que PrimaryKeyRelatedField
+            if value is None or name != attname:
+                item[name] = value
+            else:
+                item[name] = fields[name].to_representation(value)
+        data.append(item)
+    return Response(data)
 
 @api_view(['POST'])
 def create_product(request):
@@ -0,0 +1,131 @@
+# config/pagination.py
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginación por cursor (keyset) opcional.
+
+    Sin '?cursor' se comporta igual que la paginación global (PageNumberPagination).
+    Con '?cursor=' (vacío = primera página) pagina por "seek": filtra
+    WHERE (orden) > (última fila vista) en vez de COUNT(*) + OFFSET, así que
+    todas las páginas cuestan lo mismo sin importar la profundidad.
+
+    La vista define el orden estable (el último campo debe ser único, ej. 'id'):
+        keyset_ordering = ('-created_at', '-id')
+    o bien un método get_keyset_ordering(request) si depende de ?ordering=.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.cursor_query_param in request.query_params
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_keyset_ordering(request, view)
+        size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self._flip(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_condition(ordering, position))
+
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self._position(rows[-1]) if rows and has_next else None
+        self.previous_position = self._position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self._cursor_link(self.next_position, reverse=False),
+            'previous': self._cursor_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    # --- Helpers ---
+
+    def get_keyset_ordering(self, request, view):
+        if hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering(request))
+        return tuple(getattr(view, 'keyset_ordering', ('-id',)))
+
+    @staticmethod
+    def _flip(ordering):
+        return tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+
+    @staticmethod
+    def _seek_condition(ordering, position):
+        """
+        (a, b, c) > (va, vb, vc) respetando la dirección de cada campo:
+        a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _position(self, row):
+        # Acepta instancias o dicts (querysets con .values())
+        if isinstance(row, dict):
+            return [row[field.lstrip('-')] for field in self.ordering]
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def _cursor_link(self, position, reverse):
+        if position is None:
+            return None
+        payload = {'p': [self._encode_value(v) for v in position], 'r': int(reverse)}
+        token = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound('Cursor inválido.')
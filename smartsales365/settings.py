@@ -83,6 +83,34 @@ else:
         }
     }
 
+# Caché compartida entre workers (las invalidaciones del catálogo tienen que
+# llegar a todos los procesos de gunicorn). Sin REDIS_URL se usa memoria
+# local, válida solo para un proceso (desarrollo).
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cada cuántos segundos un worker revisa si sus tablas de referencia
+# (marcas, garantías, proveedores, categorías) quedaron viejas
+REFDATA_CHECK_INTERVAL = int(os.getenv('REFDATA_CHECK_INTERVAL', '5'))
+
+# Índice de autocompletado (startapps/catalogo/suggest.py): se arma al
+# arrancar cada worker y se revisa contra la versión del catálogo cada
+# SUGGEST_INDEX_MAX_AGE segundos (0 en WARM para no armarlo al arrancar)
+SUGGEST_INDEX_WARM = os.getenv('SUGGEST_INDEX_WARM', '1') == '1'
+SUGGEST_INDEX_MAX_AGE = int(os.getenv('SUGGEST_INDEX_MAX_AGE', '300'))
+
 # Contraseñas y validaciones (por defecto)
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -103,6 +131,17 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Imágenes de productos: se guardan en disco (MEDIA_ROOT/spool) durante el
+# request y un pool de hilos las sube al storage configurado.
+# Para desarrollo sin red: 'startapps.catalogo.storage.LocalImageStorage'
+CATALOG_IMAGE_STORAGE = os.getenv('CATALOG_IMAGE_STORAGE', 'startapps.catalogo.storage.SupabaseImageStorage')
+CATALOG_UPLOAD_WORKERS = int(os.getenv('CATALOG_UPLOAD_WORKERS', '2'))
+# Procesos que generan las miniaturas WebP (ver startapps/catalogo/images.py)
+CATALOG_IMAGE_PROCESSES = int(os.getenv('CATALOG_IMAGE_PROCESSES', '2'))
+# Días que se conserva el registro del feed /catalogo/changes/ (prune_catalog_changes);
+# un cliente que no sincroniza en ese plazo vuelve a bajar /catalogo/export/
+CATALOG_CHANGES_RETENTION_DAYS = int(os.getenv('CATALOG_CHANGES_RETENTION_DAYS', '30'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -137,6 +176,9 @@ CORS_ALLOW_ALL_ORIGINS = True
 # incluido 'Authorization' y 'Content-Type'
 CORS_ALLOW_HEADERS = ["*"]
 
+# Permite que el frontend lea el ETag de las respuestas del catálogo
+CORS_EXPOSE_HEADERS = ["ETag"]
+
 
 # Usuario personalizado
 AUTH_USER_MODEL = 'usuarios.User'
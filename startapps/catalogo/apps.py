@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class CatalogoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'startapps.catalogo'
+    label = 'catalogo'
+
+    def ready(self):
+        # Conecta los receivers que mantienen los índices derivados del catálogo
+        from . import signals  # noqa: F401
+
+        from django.conf import settings
+        if getattr(settings, 'SUGGEST_INDEX_WARM', True):
+            # El primer /suggest/ del worker no espera a que se arme el índice
+            from .suggest import suggestion_index
+            suggestion_index.warm()
@@ -0,0 +1,96 @@
+# apps/products/bulk.py
+"""
+Actualización masiva de precio y stock (sincronización con el ERP).
+
+Los cambios se aplican por lotes con un UPDATE ... FROM (VALUES ...) que
+actualiza precio y stock de todo el lote en una sentencia, dentro de una
+sola transacción. En motores sin UPDATE ... FROM se usa CASE WHEN del ORM.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Product
+from .signals import catalog_bulk_write
+
+BULK_UPDATE_BATCH_SIZE = 500
+# Tope de ítems por petición (lotes más grandes se parten en el cliente)
+MAX_BULK_UPDATE_ITEMS = 1000
+BULK_UPDATE_FIELDS = {
+    'price': DecimalField(max_digits=10, decimal_places=2),
+    'stock': IntegerField(),
+}
+
+
+class ProductBulkUpdateItemSerializer(serializers.Serializer):
+    # Topes de las columnas (bigint, numeric(10,2), integer): fuera de rango
+    # el CAST del UPDATE fallaría en la base
+    id = serializers.IntegerField(min_value=1, max_value=9223372036854775807)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock = serializers.IntegerField(min_value=0, max_value=2147483647, required=False)
+
+    def validate(self, attrs):
+        if 'price' not in attrs and 'stock' not in attrs:
+            raise serializers.ValidationError("Debe indicar 'price' y/o 'stock'.")
+        return attrs
+
+
+def _chunks(items):
+    for start in range(0, len(items), BULK_UPDATE_BATCH_SIZE):
+        yield items[start:start + BULK_UPDATE_BATCH_SIZE]
+
+
+def _update_from_values(chunk):
+    # Un NULL en la fila de VALUES deja la columna como estaba
+    table = connection.ops.quote_name(Product._meta.db_table)
+    rows = ', '.join(['(%s, CAST(%s AS NUMERIC), CAST(%s AS INTEGER))'] * len(chunk))
+    params = []
+    for pk, change in chunk:
+        params.extend((pk, change.get('price'), change.get('stock')))
+    # bulk-update no pasa por save(): auto_now de updated_at se aplica a mano
+    params.append(connection.ops.adapt_datetimefield_value(timezone.now()))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH v(id, price, stock) AS (VALUES {rows}) "
+            f"UPDATE {table} SET "
+            f"price = COALESCE(v.price, {table}.price), "
+            f"stock = COALESCE(v.stock, {table}.stock), "
+            f"updated_at = %s "
+            f"FROM v WHERE {table}.id = v.id",
+            params,
+        )
+
+
+def _update_with_case(chunk):
+    for field, output_field in BULK_UPDATE_FIELDS.items():
+        whens = [When(pk=pk, then=Value(change[field])) for pk, change in chunk if field in change]
+        if whens:
+            Product.objects.filter(pk__in=[pk for pk, _ in chunk]).update(**{
+                field: Case(*whens, default=field, output_field=output_field),
+                'updated_at': timezone.now(),
+            })
+
+
+def bulk_update_products(items):
+    """
+    items: dicts validados {id, price?, stock?} (si un id se repite gana el último).
+    Devuelve (ids actualizados, ids inexistentes).
+    """
+    changes = {}
+    for item in items:
+        changes.setdefault(item['id'], {}).update(item)
+
+    update_chunk = _update_from_values if connection.vendor in ('postgresql', 'sqlite') else _update_with_case
+    with transaction.atomic():
+        existing = set(
+            Product.objects.filter(pk__in=list(changes)).values_list('id', flat=True)
+        )
+        updated = sorted(existing)
+        for chunk in _chunks([(pk, changes[pk]) for pk in updated]):
+            update_chunk(chunk)
+        if updated:
+            catalog_bulk_write.send(sender=Product, pks=updated)
+
+    missing = sorted(pk for pk in changes if pk not in existing)
+    return updated, missing
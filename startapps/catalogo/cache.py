@@ -0,0 +1,154 @@
+# apps/products/cache.py
+"""
+Cachés del catálogo sobre la caché de Django (compartida entre workers).
+
+- Versión global del catálogo: se incrementa (en signals.py) después de cada
+  commit que escribe en un modelo del catálogo y sirve para invalidar todo lo
+  que se derive del catálogo (ETags, facetas, etc.).
+- Representación completa de cada producto (read-through), invalidada por
+  producto desde signals.py.
+- Respuestas completas de lecturas anónimas (ver mixins.py), con un solo
+  cálculo a la vez por entrada y stale-while-revalidate.
+"""
+import time
+import uuid
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalogo:version'
+
+
+def _seed_version():
+    # Se siembra con el reloj (ms) para que la versión siga creciendo aunque
+    # la caché se haya vaciado o reiniciado
+    cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        _seed_version()
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        _seed_version()
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+# --- Detalle de producto ya serializado ---
+
+PRODUCT_CACHE_KEY = 'catalogo:product:{}'
+PRODUCT_CACHE_TIMEOUT = 60 * 60 * 24
+PRODUCT_CACHE_HITS_KEY = 'catalogo:product_cache:hits'
+PRODUCT_CACHE_MISSES_KEY = 'catalogo:product_cache:misses'
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cached_product(pk):
+    data = cache.get(PRODUCT_CACHE_KEY.format(pk))
+    _count(PRODUCT_CACHE_HITS_KEY if data is not None else PRODUCT_CACHE_MISSES_KEY)
+    return data
+
+
+def set_cached_product(pk, data):
+    cache.set(PRODUCT_CACHE_KEY.format(pk), data, PRODUCT_CACHE_TIMEOUT)
+
+
+def invalidate_cached_products(pks):
+    keys = [PRODUCT_CACHE_KEY.format(pk) for pk in pks]
+    for start in range(0, len(keys), 1000):
+        cache.delete_many(keys[start:start + 1000])
+
+
+def product_cache_stats():
+    hits = cache.get(PRODUCT_CACHE_HITS_KEY, 0)
+    misses = cache.get(PRODUCT_CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'responses': {
+            outcome: cache.get(RESPONSE_CACHE_COUNTER_KEY.format(outcome), 0)
+            for outcome in RESPONSE_CACHE_OUTCOMES
+        },
+    }
+
+
+# --- Respuestas de lecturas anónimas ---
+
+RESPONSE_CACHE_KEY = 'catalogo:response:{}'
+RESPONSE_LOCK_KEY = 'catalogo:response:lock:{}'
+RESPONSE_CACHE_COUNTER_KEY = 'catalogo:response_cache:{}'
+RESPONSE_CACHE_OUTCOMES = ('fresh', 'stale', 'computed', 'waited')
+# Tope para calcular una entrada: después otro worker puede intentarlo
+RESPONSE_LOCK_TIMEOUT = 10
+# Cuánto espera un worker a que otro termine antes de calcularla él mismo
+RESPONSE_WAIT_TIMEOUT = 5
+RESPONSE_POLL_INTERVAL = 0.05
+
+
+def _is_fresh(entry, version):
+    return entry is not None and entry['version'] == version and time.time() < entry['fresh_until']
+
+
+def get_or_compute_response(key, compute, ttl, stale_ttl):
+    """
+    Entrada cacheada de 'key'. compute(version) arma la entrada (un dict) con
+    la versión del catálogo leída antes de calcular, o devuelve None si no
+    se debe guardar.
+
+    - Fresca: mismo catálogo y menos de 'ttl' segundos.
+    - Vencida (por tiempo o porque el catálogo cambió): un solo worker la
+      recalcula y mientras tanto los demás reciben la vieja, hasta
+      'ttl' + 'stale_ttl' segundos después de calculada.
+    - Sin entrada: un solo worker la calcula y los demás lo esperan.
+    """
+    cache_key = RESPONSE_CACHE_KEY.format(key)
+    lock_key = RESPONSE_LOCK_KEY.format(key)
+    version = get_catalog_version()
+    deadline = time.monotonic() + RESPONSE_WAIT_TIMEOUT
+    waited = False
+    while True:
+        entry = cache.get(cache_key)
+        if _is_fresh(entry, version):
+            _count(RESPONSE_CACHE_COUNTER_KEY.format('waited' if waited else 'fresh'))
+            return entry
+        # Token propio: si el lock venció y lo tomó otro worker, no se le borra
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, RESPONSE_LOCK_TIMEOUT):
+            try:
+                # Otro pudo terminar entre la lectura y el lock
+                fresh = cache.get(cache_key)
+                if _is_fresh(fresh, version):
+                    return fresh
+                entry = compute(version)
+                if entry is not None:
+                    entry['fresh_until'] = time.time() + ttl
+                    cache.set(cache_key, entry, ttl + stale_ttl)
+                _count(RESPONSE_CACHE_COUNTER_KEY.format('computed'))
+                return entry
+            finally:
+                # get + delete no es atómico, pero la ventana es mínima
+                # comparada con RESPONSE_LOCK_TIMEOUT
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+        if entry is not None:
+            _count(RESPONSE_CACHE_COUNTER_KEY.format('stale'))
+            return entry
+        if time.monotonic() >= deadline:
+            # Quien la calculaba tarda demasiado: se resuelve sin caché
+            return compute(version)
+        waited = True
+        time.sleep(RESPONSE_POLL_INTERVAL)
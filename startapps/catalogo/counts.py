@@ -0,0 +1,87 @@
+# apps/products/counts.py
+"""
+Cantidad de productos por categoría, desnormalizada en Category:
+- product_count: productos asignados directamente a la categoría;
+- subtree_product_count: los de la categoría y los de todo su subárbol.
+
+Se ajustan con UPDATE ... F() en la misma transacción que la escritura del
+producto: un alta suma 1 al product_count de su categoría y al
+subtree_product_count de ella y de cada ancestro (leídos del path).
+rebuild_category_counts() los recalcula desde cero.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Category, Product, path_ids
+
+
+def _add(field, deltas):
+    # Una sentencia por cada valor distinto (en la práctica +1 y/o -1)
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        # Si el conteo se desfasó (escrituras que no pasan por aquí) no se
+        # bloquea la escritura del producto: queda en 0 hasta el próximo rebuild
+        value = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        Category.objects.filter(pk__in=pks).update(**{field: value})
+
+
+def adjust_category_counts(deltas):
+    """ deltas: {category_id: productos agregados (o quitados, en negativo)}. """
+    deltas = {pk: delta for pk, delta in deltas.items() if pk is not None and delta}
+    if not deltas:
+        return
+    paths = dict(Category.objects.filter(pk__in=deltas).values_list('id', 'path'))
+    subtree = Counter()
+    for pk, path in paths.items():
+        for ancestor in path_ids(path):
+            subtree[ancestor] += deltas[pk]
+    _add('product_count', {pk: deltas[pk] for pk in paths})
+    _add('subtree_product_count', subtree)
+
+
+def move_subtree_count(category_id, old_ancestors, new_ancestors):
+    """ Un subárbol movido deja de contar en sus ancestros viejos y pasa a los nuevos. """
+    count = Category.objects.filter(pk=category_id).values_list('subtree_product_count', flat=True).first()
+    if not count:
+        return
+    common = set(old_ancestors) & set(new_ancestors)
+    _add('subtree_product_count', {
+        **{pk: -count for pk in old_ancestors if pk not in common},
+        **{pk: count for pk in new_ancestors if pk not in common},
+    })
+
+
+def remove_subtree_count(path, count):
+    """
+    Al borrar una categoría sus productos quedan sin categoría y sus hijos
+    pasan a ser raíz: los ancestros pierden todo su subárbol.
+    """
+    if count:
+        _add('subtree_product_count', {pk: -count for pk in path_ids(path)[:-1]})
+
+
+def rebuild_category_counts():
+    """ Recalcula ambos conteos de todas las categorías. Devuelve cuántas cambiaron. """
+    direct = dict(
+        Product.objects.filter(category__isnull=False)
+        .values_list('category_id').annotate(count=Count('id')).order_by()
+    )
+    categories = list(Category.objects.only('id', 'path', 'product_count', 'subtree_product_count'))
+    subtree = Counter()
+    for category in categories:
+        for ancestor in path_ids(category.path):
+            subtree[ancestor] += direct.get(category.pk, 0)
+
+    changed = []
+    for category in categories:
+        counts = (direct.get(category.pk, 0), subtree[category.pk])
+        if counts != (category.product_count, category.subtree_product_count):
+            category.product_count, category.subtree_product_count = counts
+            changed.append(category)
+    Category.objects.bulk_update(changed, ['product_count', 'subtree_product_count'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,89 @@
+# apps/products/documents.py
+"""
+Documento JSON precalculado de cada producto (tabla ProductDocument): la
+misma salida que ProductSerializer, lista para servir sin joins ni
+serializers anidados.
+
+- Cuando cambia un producto (o su marca, categoría, garantía o proveedor)
+  su documento se borra en la misma transacción y se regenera tras el
+  commit, ya con la caché de referencia al día (ver signals.py).
+- Al leer, los documentos que faltan se arman en el momento y se guardan.
+- DOCUMENT_VERSION se incrementa cuando cambia la forma de la
+  representación: los documentos de otra versión se ignoran hasta que el
+  comando rebuild_product_documents los regenera.
+"""
+from django.db import close_old_connections
+
+from .models import Product, ProductDocument
+from .refdata import reference_data
+from .representations import PRODUCT_LIST_COLUMNS, represent_product_rows
+
+DOCUMENT_VERSION = 1
+BUILD_BATCH_SIZE = 1000
+
+
+def render_documents(pks):
+    """ {id: representación} de los productos de 'pks' que existen. """
+    rows = Product.objects.filter(pk__in=pks).values(*PRODUCT_LIST_COLUMNS)
+    return {data['id']: data for data in represent_product_rows(rows)}
+
+
+def _store(documents, overwrite):
+    objects = [
+        ProductDocument(product_id=pk, data=data, version=DOCUMENT_VERSION)
+        for pk, data in documents.items()
+    ]
+    if overwrite:
+        ProductDocument.objects.bulk_create(
+            objects, batch_size=BUILD_BATCH_SIZE,
+            update_conflicts=True, unique_fields=['product'], update_fields=['data', 'version'],
+        )
+    else:
+        # Una lectura que armó el documento con datos previos a un cambio no
+        # pisa al que regeneró ese cambio
+        ProductDocument.objects.bulk_create(objects, batch_size=BUILD_BATCH_SIZE, ignore_conflicts=True)
+
+
+def drop_documents(pks):
+    ProductDocument.objects.filter(product_id__in=list(pks)).delete()
+
+
+def build_documents(pks):
+    """ Regenera (sobrescribiendo) los documentos de 'pks'. """
+    reference_data.refresh()
+    pks = list(pks)
+    for start in range(0, len(pks), BUILD_BATCH_SIZE):
+        _store(render_documents(pks[start:start + BUILD_BATCH_SIZE]), overwrite=True)
+
+
+def get_documents(pks):
+    """ {id: documento} de los productos de 'pks' que existen. """
+    pks = list(pks)
+    documents = dict(
+        ProductDocument.objects.filter(product_id__in=pks, version=DOCUMENT_VERSION)
+        .values_list('product_id', 'data')
+    )
+    missing = [pk for pk in pks if pk not in documents]
+    if missing:
+        reference_data.refresh()
+        rendered = render_documents(missing)
+        _store(rendered, overwrite=False)
+        documents.update(rendered)
+    return documents
+
+
+def get_document(pk):
+    return get_documents([pk]).get(pk)
+
+
+def build_document_range(first_id, last_id):
+    """
+    Tarea del comando rebuild_product_documents (corre en un proceso hijo):
+    regenera los documentos de los productos con id entre first_id y last_id.
+    """
+    close_old_connections()
+    pks = list(
+        Product.objects.filter(pk__gte=first_id, pk__lte=last_id).values_list('id', flat=True)
+    )
+    build_documents(pks)
+    return len(pks)
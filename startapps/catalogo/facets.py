@@ -0,0 +1,109 @@
+# apps/products/facets.py
+"""
+Conteos por faceta (marca, categoría, garantía y rango de precio) para la
+barra lateral de la tienda, calculados en UNA sola consulta agrupada.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .cache import get_catalog_version
+
+# Rangos de precio [min, max) en Bs.; el último no tiene tope
+PRICE_BUCKETS = (
+    (Decimal('0'), Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('2500')),
+    (Decimal('2500'), Decimal('5000')),
+    (Decimal('5000'), None),
+)
+FACETS_CACHE_TIMEOUT = 60 * 10
+# Parámetros que no cambian el conjunto filtrado
+IGNORED_PARAMS = {'page', 'page_size', 'cursor', 'ordering', 'format'}
+
+
+def _price_bucket_expression():
+    whens = []
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        condition = {'price__gte': low}
+        if high is not None:
+            condition['price__lt'] = high
+        whens.append(When(then=Value(index), **condition))
+    return Case(*whens, default=Value(None), output_field=IntegerField())
+
+
+def _add(facet, key, name, count):
+    entry = facet.setdefault(key, {'id': key, 'name': name, 'count': 0})
+    entry['count'] += count
+
+
+def _sorted(facet):
+    return sorted(facet.values(), key=lambda e: (-e['count'], e['name'] or ''))
+
+
+def compute_facets(queryset):
+    """
+    Agrupa por (marca, categoría, garantía, rango de precio) a la vez y
+    reparte los conteos de cada combinación en las cuatro facetas.
+    """
+    rows = (
+        queryset.order_by()
+        .values(
+            'brand_id', 'brand__name',
+            'category_id', 'category__name',
+            'warranty_id', 'warranty__title',
+            price_bucket=_price_bucket_expression(),
+        )
+        .annotate(count=Count('id'))
+    )
+
+    total = 0
+    brands, categories, warranties = {}, {}, {}
+    bucket_counts = [0] * len(PRICE_BUCKETS)
+    for row in rows:
+        count = row['count']
+        total += count
+        _add(brands, row['brand_id'], row['brand__name'], count)
+        _add(categories, row['category_id'], row['category__name'], count)
+        _add(warranties, row['warranty_id'], row['warranty__title'], count)
+        if row['price_bucket'] is not None:
+            bucket_counts[row['price_bucket']] += count
+
+    return {
+        'total': total,
+        'brands': _sorted(brands),
+        'categories': _sorted(categories),
+        'warranties': _sorted(warranties),
+        'price_ranges': [
+            {
+                'min': str(low),
+                'max': str(high) if high is not None else None,
+                'count': bucket_counts[index],
+            }
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def facets_cache_key(query_params):
+    """ Clave por versión del catálogo + filtros normalizados (orden y vacíos no importan). """
+    params = sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        if key not in IGNORED_PARAMS
+        for value in values
+        if value != ''
+    )
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"catalogo:facets:{get_catalog_version()}:{digest}"
+
+
+def get_facets(queryset, query_params):
+    key = facets_cache_key(query_params)
+    data = cache.get(key)
+    if data is None:
+        data = compute_facets(queryset)
+        cache.set(key, data, FACETS_CACHE_TIMEOUT)
+    return data
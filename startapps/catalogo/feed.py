@@ -0,0 +1,220 @@
+# apps/products/feed.py
+"""
+Réplica del catálogo para marketplaces y la app móvil offline:
+
+- export_lines(): snapshot completo en NDJSON, etiquetado con un número
+  de secuencia del registro de cambios (CatalogChange).
+- get_changes(since): lo que cambió después de esa secuencia, compactado
+  por objeto: 'upsert' con la representación actual o 'delete' (tombstone).
+
+Un cliente descarga el snapshot una vez y después pide /changes/?since=<seq>.
+
+La secuencia no es el id (que se reserva al insertar, y una transacción
+larga puede confirmar ids menores que los ya entregados): publish_changes()
+numera, bajo el lock de CatalogFeedState, los cambios ya confirmados. La
+llaman los lectores (changes, export) y prune_catalog_changes, nunca las
+escrituras: así guardar un producto no espera al lock del feed. Si un
+cliente vio la secuencia N, ya existen todas las menores y ninguna se le
+puede pasar.
+
+El registro se recorta con prune_catalog_changes (CATALOG_CHANGES_RETENTION_DAYS);
+un since anterior a lo borrado recibe ChangesPruned (el cliente vuelve al snapshot).
+"""
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .documents import get_documents
+from .models import Brand, CatalogChange, CatalogFeedState, Category, Product, Warranty, WarrantyProvider
+from .refdata import reference_data
+from .representations import PRODUCT_LIST_COLUMNS, represent_product_rows
+
+ENTITY_MODELS = {
+    'provider': WarrantyProvider,
+    'warranty': Warranty,
+    'brand': Brand,
+    'category': Category,
+    'product': Product,
+}
+ENTITY_NAMES = {model: name for name, model in ENTITY_MODELS.items()}
+
+EXPORT_CHUNK_SIZE = 2000
+MAX_CHANGES = 5000
+PUBLISH_BATCH_SIZE = 1000
+
+
+class ChangesPruned(Exception):
+    """ El 'since' pedido es anterior al registro que se conserva. """
+    def __init__(self, pruned_seq):
+        super().__init__(pruned_seq)
+        self.pruned_seq = pruned_seq
+
+
+# --- Registro ---
+
+def log_changes(model, object_ids, op=CatalogChange.Op.UPSERT):
+    entity = ENTITY_NAMES.get(model)
+    if entity is None or not object_ids:
+        return
+    CatalogChange.objects.bulk_create(
+        [CatalogChange(entity=entity, object_id=pk, op=op) for pk in object_ids],
+        batch_size=1000,
+    )
+
+
+def _feed_state():
+    state, _ = CatalogFeedState.objects.get_or_create(pk=1)
+    return state
+
+
+def publish_changes():
+    """
+    Asigna secuencias consecutivas a los cambios confirmados que todavía no
+    tienen, en orden de id. Corre antes de cada lectura del feed y al
+    recortarlo. Devuelve la última secuencia publicada.
+    """
+    pending = CatalogChange.objects.filter(seq__isnull=True)
+    if not pending.exists():
+        return _feed_state().last_seq
+    _feed_state()
+    with transaction.atomic():
+        # Una escritura sobre la fila de estado antes de leer: bloquea a los
+        # demás publicadores hasta el commit (fila en PostgreSQL, base en SQLite)
+        CatalogFeedState.objects.filter(pk=1).update(last_seq=F('last_seq'))
+        state = CatalogFeedState.objects.get(pk=1)
+        ids = list(pending.order_by('id').values_list('id', flat=True))
+        changes = [CatalogChange(pk=pk, seq=state.last_seq + offset) for offset, pk in enumerate(ids, start=1)]
+        CatalogChange.objects.bulk_update(changes, ['seq'], batch_size=PUBLISH_BATCH_SIZE)
+        state.last_seq += len(changes)
+        state.save(update_fields=['last_seq'])
+    return state.last_seq
+
+
+def prune_changes(older_than):
+    """
+    Borra los cambios publicados hace más de 'older_than' (timedelta).
+    Devuelve (cantidad borrada, secuencia hasta la que se borró).
+    Publica antes lo pendiente, para que también entre en el recorte.
+    """
+    cutoff = timezone.now() - older_than
+    publish_changes()
+    _feed_state()
+    with transaction.atomic():
+        CatalogFeedState.objects.filter(pk=1).update(pruned_seq=F('pruned_seq'))
+        state = CatalogFeedState.objects.get(pk=1)
+        last = CatalogChange.objects.filter(seq__isnull=False, created_at__lt=cutoff).aggregate(last=Max('seq'))['last']
+        if last is None:
+            return 0, state.pruned_seq
+        deleted, _ = CatalogChange.objects.filter(seq__lte=last).delete()
+        state.pruned_seq = max(state.pruned_seq, last)
+        state.save(update_fields=['pruned_seq'])
+    return deleted, state.pruned_seq
+
+
+# --- Representaciones (las mismas de los endpoints de lectura) ---
+
+def _category_row(row):
+    # Plano: sin 'children' (el árbol se arma del lado del cliente)
+    return {'id': row['id'], 'name': row['name'], 'parent': row['parent_id'], 'description': row['description']}
+
+
+def render(entity, ids):
+    """ {id: representación} de los objetos que todavía existen. """
+    model = ENTITY_MODELS[entity]
+    ids = list(ids)
+    if entity == 'product':
+        return get_documents(ids)
+    if entity == 'category':
+        rows = Category.objects.filter(pk__in=ids).values('id', 'name', 'parent_id', 'description')
+        return {row['id']: _category_row(row) for row in rows}
+    data = {}
+    for pk in ids:
+        representation = reference_data.representation(model, pk)
+        if representation is not None:
+            data[pk] = representation
+    return data
+
+
+# --- Snapshot ---
+
+def _line(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _chunks(iterator):
+    while True:
+        chunk = list(islice(iterator, EXPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_lines(seq):
+    """
+    Primera línea: {"type": "snapshot", "seq": N}; luego una línea por
+    objeto {"entity", "id", "data"} (referencias primero, productos al final).
+    """
+    yield _line({'type': 'snapshot', 'seq': seq})
+    reference_data.refresh()
+    for entity in ('provider', 'warranty', 'brand'):
+        for data in reference_data.representations(ENTITY_MODELS[entity]):
+            yield _line({'entity': entity, 'id': data['id'], 'data': data})
+
+    categories = Category.objects.order_by('id').values('id', 'name', 'parent_id', 'description')
+    for row in categories.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _line({'entity': 'category', 'id': row['id'], 'data': _category_row(row)})
+
+    products = Product.objects.order_by('id').values(*PRODUCT_LIST_COLUMNS)
+    for chunk in _chunks(products.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+        yield ''.join(
+            _line({'entity': 'product', 'id': data['id'], 'data': data})
+            for data in represent_product_rows(chunk)
+        )
+
+
+# --- Feed incremental ---
+
+def get_changes(since, limit=MAX_CHANGES):
+    """
+    Cambios con secuencia > since (hasta 'limit' registros), uno por objeto:
+    el último. Devuelve (cambios, next_since, has_more). Lanza ChangesPruned
+    si parte de lo pedido ya se borró del registro.
+    """
+    publish_changes()
+    pruned_seq = _feed_state().pruned_seq
+    if since < pruned_seq:
+        raise ChangesPruned(pruned_seq)
+    reference_data.refresh()
+    log = list(
+        CatalogChange.objects.filter(seq__gt=since)
+        .order_by('seq').values_list('seq', 'entity', 'object_id', 'op')[:limit + 1]
+    )
+    has_more = len(log) > limit
+    log = log[:limit]
+    if not log:
+        return [], since, False
+
+    latest = {}
+    for seq, entity, object_id, op in log:
+        latest.pop((entity, object_id), None)  # el orden final es el del último cambio
+        latest[(entity, object_id)] = (seq, op)
+
+    upserts = {}
+    for entity in ENTITY_MODELS:
+        ids = [pk for (name, pk), (_, op) in latest.items() if name == entity and op == CatalogChange.Op.UPSERT]
+        if ids:
+            upserts[entity] = render(entity, ids)
+
+    changes = []
+    for (entity, object_id), (seq, op) in latest.items():
+        data = upserts.get(entity, {}).get(object_id)
+        if data is None:
+            # Borrado, o ya no existe cuando se consulta
+            changes.append({'seq': seq, 'entity': entity, 'id': object_id, 'op': CatalogChange.Op.DELETE})
+        else:
+            changes.append({'seq': seq, 'entity': entity, 'id': object_id, 'op': op, 'data': data})
+    return changes, log[-1][0], has_more
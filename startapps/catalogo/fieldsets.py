@@ -0,0 +1,69 @@
+# apps/products/fieldsets.py
+"""
+Sparse fieldsets para los endpoints del catálogo:
+- ?fields=id,name,price,image_url  -> solo esos campos
+- ?expand=category,brand           -> solo esas relaciones van anidadas; las
+  demás relaciones expandibles se devuelven como id.
+Sin parámetros la respuesta es la de siempre (todo anidado).
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_list(value):
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def get_fieldset(request):
+    """ (fields, expand) pedidos; None = sin restricción. """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    return _parse_list(request.query_params.get('fields')), _parse_list(request.query_params.get('expand'))
+
+
+def trim_representation(data, fields, expand, expandable=(), children_key=None):
+    """
+    Aplica el fieldset a una representación ya armada (caché, memoria).
+    Siempre devuelve un dict nuevo: las representaciones cacheadas se comparten.
+    """
+    if fields is None and expand is None:
+        return data
+
+    result = {}
+    for key, value in data.items():
+        if fields is not None and key not in fields:
+            continue
+        if expand is not None and key in expandable and key not in expand and isinstance(value, dict):
+            value = value['id']
+        elif key == children_key:
+            value = [trim_representation(child, fields, expand, expandable, children_key) for child in value]
+        result[key] = value
+    return result
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Recorta los campos del serializer según ?fields= / ?expand= (solo en
+    lecturas y solo para el serializer principal de la vista), así los campos
+    descartados ni siquiera se calculan.
+    """
+    # campo anidado -> atributo con el id, para devolverlo "colapsado"
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        view = self.context.get('view')
+        if view is None or type(self) is not view.get_serializer_class():
+            return
+
+        fields, expand = get_fieldset(self.context.get('request'))
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields and not self.fields[name].write_only:
+                    self.fields.pop(name)
+        if expand is not None:
+            for name, source in self.expandable_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = serializers.IntegerField(source=source, read_only=True)
@@ -0,0 +1,38 @@
+import django_filters
+from .models import Product, Category
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filtro del endpoint de Productos.
+    """
+
+    # Todos los productos bajo una categoría, a cualquier profundidad
+    category_tree = django_filters.NumberFilter(
+        method='filter_by_category_tree',
+        label="Categoría (incluye subcategorías)"
+    )
+
+    class Meta:
+        model = Product
+        fields = {
+            'category': ['exact'], # Filtra por ID de categoría
+            'category__parent': ['exact'], # Filtra por ID de la categoría padre
+            'price': ['gte', 'lte'], # Filtra por precio (ej. price__gte=100)
+        }
+
+    def filter_by_category_tree(self, queryset, name, value):
+        """
+        Usa el materialized path de Category: el subárbol completo sale de un
+        único LIKE 'path%' indexado, resuelto como subconsulta IN (sin recorrer
+        el árbol nivel por nivel).
+        """
+        if value is None:
+            return queryset
+
+        root_path = Category.objects.filter(pk=value).values_list('path', flat=True).first()
+        if root_path is None:
+            return queryset.none()
+
+        subtree = Category.objects.filter(path__startswith=root_path).values('pk')
+        return queryset.filter(category__in=subtree)
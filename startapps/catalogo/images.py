@@ -0,0 +1,63 @@
+# apps/products/images.py
+"""
+Derivados de las imágenes de productos (miniaturas en WebP).
+
+El redimensionado es CPU puro, así que corre en un pool de procesos
+acotado y no en los hilos de subida ni en los workers de requests.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+# nombre -> lado máximo en píxeles (nunca se agranda el original)
+IMAGE_DERIVATIVES = {
+    'thumb': 120,
+    'small': 320,
+    'medium': 640,
+    'large': 1280,
+}
+WEBP_QUALITY = 80
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_derivatives(source_path):
+    """
+    Se ejecuta en el proceso hijo: genera un .webp por derivado junto al
+    original y devuelve {nombre: ruta}.
+    """
+    source = Path(source_path)
+    outputs = {}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        for name, size in IMAGE_DERIVATIVES.items():
+            derivative = image.copy()
+            derivative.thumbnail((size, size), Image.LANCZOS)
+            path = source.with_name(f"{source.stem}_{name}.webp")
+            derivative.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            outputs[name] = str(path)
+    return outputs
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn': hacer fork de un worker con hilos y conexiones abiertas no es seguro
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'CATALOG_IMAGE_PROCESSES', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def generate_derivatives(source_path):
+    """ Bloquea al hilo que llama (no al proceso) hasta tener los derivados. """
+    return _get_pool().submit(render_derivatives, str(source_path)).result()
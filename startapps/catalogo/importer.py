@@ -0,0 +1,295 @@
+# apps/products/importer.py
+"""
+Importación masiva de productos desde CSV o NDJSON.
+
+- Sin 'id' cada fila es un producto nuevo completo; con 'id' se actualiza
+  uno existente, solo en las columnas presentes en la fila (una relación
+  se quita con brand_id/category_id/warranty_id en null; en CSV, con la
+  celda 'null', porque las vacías cuentan como no indicadas). Un mismo id
+  no puede repetirse en el archivo.
+- El archivo debe estar en UTF-8 (si no, 400 sin escribir nada).
+- Marca, categoría y garantía se indican por nombre (brand, category,
+  warranty) o por id (brand_id, ...); los nombres se resuelven contra la
+  caché de referencia, sin consultas.
+- Se valida y se escribe por lotes (bulk_create / bulk_update), cada uno
+  en su savepoint: si la base rechaza el lote se reintenta fila por fila y
+  las que fallan van al reporte. Al final se emite catalog_bulk_write para
+  actualizar índices y cachés una sola vez.
+"""
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .counts import adjust_category_counts
+from .models import Brand, Category, Product, Warranty
+from .refdata import reference_data
+from .signals import catalog_bulk_write
+
+IMPORT_BATCH_SIZE = 1000
+# Tope de PositiveIntegerField (el mismo que pone ModelSerializer)
+MAX_STOCK = 2147483647
+# Celda CSV que indica una relación vacía (las celdas vacías se ignoran)
+CSV_NULL = 'null'
+# Tope de errores devueltos en el reporte (el total se informa igual)
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FIELDS = ('name', 'description', 'price', 'stock', 'category', 'warranty', 'brand')
+RELATIONS = {
+    'category': (Category, 'Categoría'),
+    'warranty': (Warranty, 'Garantía'),
+    'brand': (Brand, 'Marca'),
+}
+
+CSV_FORMATS = ('csv',)
+NDJSON_FORMATS = ('ndjson', 'jsonl', 'json')
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    stock = serializers.IntegerField(required=False, min_value=0, max_value=MAX_STOCK, default=0)
+    category = serializers.CharField(required=False)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    warranty = serializers.CharField(required=False)
+    warranty_id = serializers.IntegerField(required=False, allow_null=True)
+    brand = serializers.CharField(required=False)
+    brand_id = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        errors = {}
+        for field, (model, label) in RELATIONS.items():
+            given = f'{field}_id' in attrs or field in attrs
+            pk = attrs.pop(f'{field}_id', None)
+            name = attrs.pop(field, None)
+            if pk is not None:
+                instance = reference_data.get(model, pk)
+                if instance is None:
+                    errors[f'{field}_id'] = [f'{label} con id {pk} no existe.']
+            elif name is not None:
+                pks = reference_data.name_index(model).get(name.strip().lower(), [])
+                instance = reference_data.get(model, pks[0]) if len(pks) == 1 else None
+                if not pks:
+                    errors[field] = [f'{label} "{name}" no existe.']
+                elif len(pks) > 1:
+                    errors[field] = [f'{label} "{name}" es ambigua; use {field}_id.']
+            elif not given and self.partial:
+                # Actualización: la relación no indicada no se toca
+                continue
+            else:
+                instance = None
+            attrs[field] = instance
+        if errors:
+            raise serializers.ValidationError(errors)
+        if self.partial and not attrs.keys() - {'id'}:
+            raise serializers.ValidationError('La fila no indica ningún campo para actualizar.')
+        return attrs
+
+
+def detect_format(file):
+    """ 'csv' o 'ndjson' según la extensión o el content-type del archivo. """
+    extension = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
+    content_type = (file.content_type or '').lower()
+    if extension in CSV_FORMATS or content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if extension in NDJSON_FORMATS or content_type in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def _csv_row(row):
+    # Las celdas vacías cuentan como columnas no indicadas; 'null' en una
+    # columna *_id quita la relación
+    values = {}
+    for key, value in row.items():
+        if not key or value in (None, ''):
+            continue
+        key = key.strip()
+        if key.endswith('_id') and value.strip().lower() == CSV_NULL:
+            value = None
+        values[key] = value
+    return values
+
+
+def _read(text, file_format):
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, _csv_row(row)
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def read_rows(file, file_format):
+    """
+    Genera (número de fila, dict o None si la línea es inválida). Si el
+    archivo no es UTF-8 lanza ValidationError (400; run() revierte lo escrito).
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    number = 0
+    try:
+        for number, row in _read(text, file_format):
+            yield number, row
+    except UnicodeDecodeError:
+        where = f' (después de la fila {number})' if number else ''
+        raise serializers.ValidationError({
+            'file': f'El archivo no está en UTF-8{where}; guárdelo como "CSV UTF-8" '
+                    'o conviértalo antes de importarlo.'
+        })
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == IMPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ProductImport:
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.error_count = 0
+        self.written_ids = []
+        self._batch_errors = []
+        self._update_rows = {}  # id -> fila que lo actualiza (para detectar repetidos)
+
+    def _error(self, row, errors):
+        self.error_count += 1
+        self._batch_errors.append({'row': row, 'errors': errors})
+
+    def _flush_errors(self):
+        # Los errores de validación y de escritura de un lote, en orden de fila
+        self._batch_errors.sort(key=lambda error: error['row'])
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend(self._batch_errors[:max(room, 0)])
+        self._batch_errors = []
+
+    def _write(self, valid):
+        new = []
+        updates = {}
+        for attrs in valid:
+            row = attrs.pop('_row')
+            pk = attrs.pop('id', None)
+            if pk is None:
+                new.append(Product(**attrs))
+            else:
+                updates[pk] = (row, attrs)
+
+        existing = Product.objects.only('id', *IMPORT_FIELDS).in_bulk(list(updates))
+        now = timezone.now()
+        # Se actualizan solo las columnas de cada fila: un bulk_update por conjunto de columnas
+        changed = defaultdict(list)
+        # bulk_create/bulk_update no emiten post_save: los conteos por categoría se ajustan acá
+        category_deltas = Counter(product.category_id for product in new)
+        for pk, (row, attrs) in updates.items():
+            product = existing.get(pk)
+            if product is None:
+                self._error(row, {'id': [f'El producto {pk} no existe.']})
+                continue
+            if 'category' in attrs:
+                category_deltas[product.category_id] -= 1
+                category_deltas[attrs['category'].pk if attrs['category'] else None] += 1
+            for field, value in attrs.items():
+                setattr(product, field, value)
+            # bulk_update no aplica auto_now
+            product.updated_at = now
+            changed[tuple(sorted(attrs))].append(product)
+
+        updated = sum(len(products) for products in changed.values())
+        if self.dry_run:
+            self.created += len(new)
+            self.updated += updated
+            return
+        Product.objects.bulk_create(new, batch_size=IMPORT_BATCH_SIZE)
+        for fields, products in changed.items():
+            Product.objects.bulk_update(products, (*fields, 'updated_at'), batch_size=IMPORT_BATCH_SIZE)
+        adjust_category_counts(category_deltas)
+        self.created += len(new)
+        self.updated += updated
+        self.written_ids.extend(p.pk for p in new)
+        self.written_ids.extend(p.pk for products in changed.values() for p in products)
+
+    def _process(self, batch):
+        # Un solo serializer por lote: sus campos se construyen una vez y se
+        # reutilizan en cada fila (como hace ListSerializer con su 'child',
+        # pero sin descartar las filas válidas cuando otra falla)
+        # (uno completo para altas y uno parcial para actualizaciones)
+        validators = {False: ProductImportRowSerializer(), True: ProductImportRowSerializer(partial=True)}
+        valid = []
+        for number, row in batch:
+            if row is None:
+                self._error(number, {'non_field_errors': ['La línea no es un objeto JSON válido.']})
+                continue
+            try:
+                attrs = validators['id' in row].run_validation(row)
+            except serializers.ValidationError as exc:
+                self._error(number, serializers.as_serializer_error(exc))
+                continue
+            pk = attrs.get('id')
+            if pk is not None:
+                first = self._update_rows.setdefault(pk, number)
+                if first != number:
+                    self._error(number, {'id': [f'El producto {pk} ya se actualiza en la fila {first}.']})
+                    continue
+            attrs['_row'] = number
+            valid.append(attrs)
+        if valid:
+            self._write_batch(valid)
+        self._flush_errors()
+
+    def _write_batch(self, valid):
+        # Copias: _write consume '_row' e 'id' de cada fila
+        errors, error_count = len(self._batch_errors), self.error_count
+        try:
+            with transaction.atomic():
+                self._write([dict(attrs) for attrs in valid])
+            return
+        except DatabaseError:
+            del self._batch_errors[errors:]
+            self.error_count = error_count
+        # La base rechazó el lote (un valor fuera de rango, una FK borrada...):
+        # fila por fila, para reportar solo las que fallan
+        for attrs in valid:
+            try:
+                with transaction.atomic():
+                    self._write([dict(attrs)])
+            except DatabaseError as exc:
+                self._error(attrs['_row'], {'non_field_errors': [f'No se pudo guardar la fila: {exc}']})
+
+    def run(self, rows):
+        reference_data.refresh()
+        with transaction.atomic():
+            for batch in _batches(rows):
+                self._process(batch)
+            if self.written_ids:
+                catalog_bulk_write.send(sender=Product, pks=self.written_ids)
+        return self.report()
+
+    def report(self):
+        return {
+            'dry_run': self.dry_run,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
@@ -0,0 +1,132 @@
+# apps/products/management/commands/bench_product_list.py
+import random
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from startapps.catalogo.models import Brand, Category, Product, Warranty, WarrantyProvider
+from startapps.catalogo.refdata import reference_data
+from startapps.catalogo.representations import PRODUCT_LIST_COLUMNS, represent_product_rows
+from startapps.catalogo.serializers import (
+    BrandSerializer, CategorySerializer, ProductSerializer, WarrantySerializer,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+# Referencia: el ProductSerializer original, con CategorySerializer,
+# WarrantySerializer y BrandSerializer anidados (sin la caché de referencia)
+
+class _RecursiveReferenceCategorySerializer(serializers.Serializer):
+    def to_representation(self, value):
+        return _ReferenceCategorySerializer(value, context=self.context).data
+
+
+class _ReferenceCategorySerializer(CategorySerializer):
+    children = _RecursiveReferenceCategorySerializer(many=True, read_only=True)
+
+    class Meta(CategorySerializer.Meta):
+        # Los campos originales (los contadores no van anidados en el producto)
+        fields = ['id', 'name', 'parent', 'children', 'description']
+
+
+class _ReferenceProductSerializer(serializers.ModelSerializer):
+    category = _ReferenceCategorySerializer(read_only=True)
+    warranty = WarrantySerializer(read_only=True)
+    brand = BrandSerializer(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'name', 'description', 'price', 'stock', 'category', 'warranty', 'brand',
+            'image_url', 'image_status', 'images',
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el listado de productos por el ProductSerializer original (con "
+        "serializers anidados) y por el actual (caché de referencia) contra el camino "
+        "rápido values() por tamaño de página, verificando que el JSON sea idéntico. "
+        "Los datos de prueba se crean en una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 25, 50, 100])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['products'])
+                reference_data.invalidate()
+                self._run(options['sizes'], options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        reference_data.invalidate()
+
+    def _seed(self, count):
+        rng = random.Random(365)
+        brands = [Brand.objects.create(name=f"bench-brand-{i}") for i in range(10)]
+        provider = WarrantyProvider.objects.create(name="bench-provider")
+        warranties = [
+            Warranty.objects.create(provider=provider, title=f"bench-{i}", terms="Términos " * 80, duration_days=365)
+            for i in range(3)
+        ]
+        roots = [Category.objects.create(name=f"bench-root-{i}") for i in range(3)]
+        categories = roots + [
+            Category.objects.create(name=f"bench-child-{i}", parent=roots[i % 3]) for i in range(9)
+        ]
+        Product.objects.bulk_create([
+            Product(
+                name=f"Producto de prueba {i}",
+                description="Descripción de prueba " * 20,
+                price=Decimal(rng.randint(100, 999999)) / 100,
+                stock=rng.randint(0, 100),
+                category=rng.choice(categories + [None]),
+                warranty=rng.choice(warranties + [None]),
+                brand=rng.choice(brands + [None]),
+                image_url=f"https://example.com/{i}.jpg",
+            )
+            for i in range(count)
+        ])
+
+    def _run(self, sizes, repeat):
+        renderer = JSONRenderer()
+        queryset = Product.objects.order_by('id')
+
+        self.stdout.write(
+            f"{'page':>6} {'nested ms':>11} {'serializer ms':>15} {'values() ms':>13} {'speedup':>9}"
+        )
+        for size in sizes:
+            def nested_path():
+                return renderer.render(_ReferenceProductSerializer(list(queryset[:size]), many=True).data)
+
+            def serializer_path():
+                return renderer.render(ProductSerializer(list(queryset[:size]), many=True).data)
+
+            def fast_path():
+                return renderer.render(represent_product_rows(queryset.values(*PRODUCT_LIST_COLUMNS)[:size]))
+
+            expected = nested_path()
+            for name, path in (('ProductSerializer', serializer_path), ('values()', fast_path)):
+                if path() != expected:
+                    self.stderr.write(self.style.ERROR(
+                        f"El JSON de {name} difiere del serializer anidado con página de {size}"
+                    ))
+                    return
+
+            nested = min(timeit.repeat(nested_path, number=1, repeat=repeat)) * 1000
+            slow = min(timeit.repeat(serializer_path, number=1, repeat=repeat)) * 1000
+            fast = min(timeit.repeat(fast_path, number=1, repeat=repeat)) * 1000
+            self.stdout.write(f"{size:>6} {nested:>11.2f} {slow:>15.2f} {fast:>13.2f} {nested / fast:>8.1f}x")
+
+        self.stdout.write(self.style.SUCCESS("JSON idéntico en todos los tamaños de página."))
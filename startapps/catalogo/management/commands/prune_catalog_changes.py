@@ -0,0 +1,22 @@
+# apps/products/management/commands/prune_catalog_changes.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from startapps.catalogo.feed import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra del registro del feed de cambios los publicados hace más de --days días "
+        "(por defecto CATALOG_CHANGES_RETENTION_DAYS). Los clientes con una secuencia "
+        "anterior reciben 410 en /changes/ y vuelven a bajar el snapshot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CATALOG_CHANGES_RETENTION_DAYS', 30))
+
+    def handle(self, *args, **options):
+        deleted, pruned_seq = prune_changes(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Cambios borrados: {deleted}; registro conservado desde la secuencia {pruned_seq + 1}."))
@@ -0,0 +1,12 @@
+# apps/products/management/commands/rebuild_category_counts.py
+from django.core.management.base import BaseCommand
+
+from startapps.catalogo.counts import rebuild_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Category.product_count y subtree_product_count a partir de los productos.'
+
+    def handle(self, *args, **options):
+        count = rebuild_category_counts()
+        self.stdout.write(self.style.SUCCESS(f"Categorías corregidas: {count}."))
@@ -0,0 +1,44 @@
+# apps/products/management/commands/rebuild_product_documents.py
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from startapps.catalogo.documents import build_document_range
+from startapps.catalogo.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenera los documentos precalculados de todos los productos (ProductDocument), '
+        'por lotes de ids repartidos entre varios procesos. Usar tras cambiar la representación.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos en paralelo (1 = en este mismo proceso).')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Productos por tarea.')
+
+    def handle(self, *args, **options):
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        size = max(options['batch_size'], 1)
+        ranges = [(chunk[0], chunk[-1]) for chunk in (ids[i:i + size] for i in range(0, len(ids), size))]
+
+        if options['workers'] <= 1 or len(ranges) <= 1:
+            total = sum(build_document_range(first, last) for first, last in ranges)
+        else:
+            total = 0
+            # 'spawn': cada hijo arranca Django de cero y abre su propia conexión
+            with ProcessPoolExecutor(
+                max_workers=min(options['workers'], len(ranges)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            ) as pool:
+                futures = [pool.submit(build_document_range, first, last) for first, last in ranges]
+                for future in as_completed(futures):
+                    total += future.result()
+                    self.stdout.write(f"  {total}/{len(ids)}")
+        self.stdout.write(self.style.SUCCESS(f"Documentos regenerados: {total}."))
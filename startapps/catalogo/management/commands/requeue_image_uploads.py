@@ -0,0 +1,30 @@
+# apps/products/management/commands/requeue_image_uploads.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from startapps.catalogo.uploads import requeue_stale_uploads, sweep_spool
+
+
+class Command(BaseCommand):
+    help = (
+        "Retoma las subidas de imágenes que quedaron PENDING (el worker se reinició o "
+        "se cayó) y borra los archivos del spool que ningún producto referencia. "
+        "Pensado para correr al desplegar o periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=600,
+            help="Segundos sin cambios para considerar colgada una subida o huérfano un archivo.",
+        )
+        parser.add_argument('--failed', action='store_true', help="Reintenta también las subidas FAILED.")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(seconds=options['older_than'])
+        requeued, lost = requeue_stale_uploads(older_than, include_failed=options['failed'])
+        removed = sweep_spool(older_than)
+        self.stdout.write(self.style.SUCCESS(
+            f"Subidas reprocesadas: {requeued}; sin archivo (FAILED): {lost}; "
+            f"archivos huérfanos borrados: {removed}."
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model('catalogo', 'Category')
+    categories = {c.pk: c for c in Category.objects.only('id', 'parent_id', 'path', 'depth')}
+
+    def resolve(category, seen=()):
+        if category.path:
+            return category.path
+        parent = categories.get(category.parent_id)
+        if parent is None or parent.pk in seen:
+            category.path = f"{category.pk}/"
+        else:
+            category.path = f"{resolve(parent, seen + (category.pk,))}{category.pk}/"
+        category.depth = category.path.count('/') - 1
+        return category.path
+
+    for category in categories.values():
+        resolve(category)
+    Category.objects.bulk_update(categories.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0003_delete_activatedwarranty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Profundidad'),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
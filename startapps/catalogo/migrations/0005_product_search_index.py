@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:30
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from startapps.catalogo import search
+    search.create_search_index(schema_editor.connection)
+    search.rebuild_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from startapps.catalogo import search
+    search.drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """
+    Índice full-text de productos: tsvector + GIN en PostgreSQL y tabla
+    virtual FTS5 en SQLite (ver startapps/catalogo/search.py).
+    """
+
+    dependencies = [
+        ('catalogo', '0004_category_path_depth'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+def mark_existing_images(apps, schema_editor):
+    # Los productos que ya tienen URL se subieron de forma síncrona
+    Product = apps.get_model('catalogo', 'Product')
+    Product.objects.exclude(image_url__isnull=True).exclude(image_url='').update(image_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0005_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'Sin imagen'), ('pending', 'Subiendo'), ('ready', 'Lista'), ('failed', 'Error al subir')], default='none', max_length=10, verbose_name='Estado de la Imagen'),
+        ),
+        migrations.RunPython(mark_existing_images, migrations.RunPython.noop),
+    ]
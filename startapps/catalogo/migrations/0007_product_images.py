@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0006_product_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='images',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Derivados de Imagen'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0007_product_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('url', models.URLField(max_length=1024, verbose_name='URL')),
+                ('images', models.JSONField(blank=True, default=dict, verbose_name='Derivados')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Imagen Almacenada',
+                'verbose_name_plural': 'Imágenes Almacenadas',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0008_storedimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bought_together', 'Comprados juntos')], max_length=20)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalogo.product')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='catalogo.product')),
+            ],
+            options={
+                'verbose_name': 'Producto Relacionado',
+                'verbose_name_plural': 'Productos Relacionados',
+                'indexes': [models.Index(fields=['product', 'kind', 'rank'], name='product_neighbor_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'neighbor'), name='unique_product_neighbor')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0009_productneighbor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Última Modificación'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='productneighbor',
+            name='kind',
+            field=models.CharField(choices=[('bought_together', 'Comprados juntos'), ('similar', 'Similares')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0010_product_updated_at_similar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='popularity_score',
+            field=models.FloatField(default=0, verbose_name='Popularidad'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-popularity_score', '-id'], name='product_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-popularity_score', '-id'], name='product_cat_popularity_idx'),
+        ),
+    ]
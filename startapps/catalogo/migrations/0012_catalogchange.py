@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0011_product_popularity_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=20, verbose_name='Entidad')),
+                ('object_id', models.BigIntegerField(verbose_name='Id del Objeto')),
+                ('op', models.CharField(choices=[('upsert', 'Alta o modificación'), ('delete', 'Baja')], max_length=10, verbose_name='Operación')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio del Catálogo',
+                'verbose_name_plural': 'Cambios del Catálogo',
+            },
+        ),
+    ]
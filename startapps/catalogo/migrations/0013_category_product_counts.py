@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:02
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_category_counts(apps, schema_editor):
+    Category = apps.get_model('catalogo', 'Category')
+    Product = apps.get_model('catalogo', 'Product')
+    direct = dict(
+        Product.objects.filter(category__isnull=False)
+        .values_list('category_id').annotate(count=Count('id')).order_by()
+    )
+    categories = list(Category.objects.only('id', 'path'))
+    subtree = Counter()
+    for category in categories:
+        for pk in category.path.split('/'):
+            if pk:
+                subtree[int(pk)] += direct.get(category.pk, 0)
+    for category in categories:
+        category.product_count = direct.get(category.pk, 0)
+        category.subtree_product_count = subtree[category.pk]
+    Category.objects.bulk_update(categories, ['product_count', 'subtree_product_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0012_catalogchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Productos'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Productos (con subcategorías)'),
+        ),
+        migrations.RunPython(populate_category_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0013_category_product_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='catalogo.product')),
+                ('data', models.JSONField()),
+                ('version', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Documento de Producto',
+                'verbose_name_plural': 'Documentos de Productos',
+            },
+        ),
+    ]
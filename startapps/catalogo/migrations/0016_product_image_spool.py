@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0015_product_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_spool',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:20
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_changes(apps, schema_editor):
+    # Los cambios ya registrados están confirmados: su secuencia es su id
+    # (la que ya recibieron los clientes como 'since')
+    CatalogChange = apps.get_model('catalogo', 'CatalogChange')
+    CatalogFeedState = apps.get_model('catalogo', 'CatalogFeedState')
+    CatalogChange.objects.update(seq=F('id'))
+    last_seq = CatalogChange.objects.aggregate(last=Max('id'))['last'] or 0
+    CatalogFeedState.objects.create(pk=1, last_seq=last_seq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0016_product_image_spool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogchange',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True, unique=True, verbose_name='Secuencia'),
+        ),
+        migrations.CreateModel(
+            name='CatalogFeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seq', models.BigIntegerField(default=0)),
+                ('pruned_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='catalogchange',
+            index=models.Index(condition=models.Q(('seq__isnull', True)), fields=['id'], name='catalogchange_unpublished_idx'),
+        ),
+    ]
@@ -0,0 +1,161 @@
+# apps/products/mixins.py
+import hashlib
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.exceptions import ValidationError
+
+from .cache import get_catalog_version, get_or_compute_response
+
+
+def request_fingerprint(request):
+    """ Hash de la ruta, los parámetros (normalizados) y el Accept de la petición. """
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+    )
+    fingerprint = f"{request.path}?{params}|{request.META.get('HTTP_ACCEPT', '')}"
+    return hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def catalog_etag(request, version=None):
+    """ ETag débil = versión del catálogo + huella de la petición. """
+    if version is None:
+        version = get_catalog_version()
+    return f'W/"{version}-{request_fingerprint(request)[:16]}"'
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """ Comparación débil (RFC 9110) del If-None-Match contra 'etag'. """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    candidates = {_strip_weak(tag) for tag in parse_etags(if_none_match)}
+    return '*' in candidates or _strip_weak(etag) in candidates
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+class NotModified(Exception):
+    """ Lanzada en initial() cuando el If-None-Match coincide (respuesta 304). """
+
+
+class CatalogETagMixin:
+    """
+    Para las vistas de lectura del catálogo: agrega el ETag (versión del
+    catálogo) a los GET de las acciones de 'etag_actions' y responde 304 si
+    el If-None-Match coincide. La comparación va en initial(), después de la
+    autenticación, los permisos y el throttling, pero antes de tocar la base
+    de datos o los serializers. En vistas que no son ViewSet aplica a todo GET.
+    """
+    # Solo acciones cuyo contenido depende únicamente de la versión del catálogo
+    etag_actions = ('list', 'retrieve')
+
+    def _uses_catalog_etag(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        action = getattr(self, 'action', None)
+        return action is None or action in self.etag_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self._uses_catalog_etag(request):
+            return
+        self._catalog_etag = catalog_etag(request)
+        if etag_matches(request, self._catalog_etag):
+            raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return not_modified(self._catalog_etag)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_catalog_etag', None)
+        if etag and response.status_code == 200 and not response.has_header('ETag'):
+            response['ETag'] = etag
+        return response
+
+
+def _is_anonymous(request):
+    # Antes de la autenticación de DRF: sin JWT y sin sesión iniciada
+    return 'HTTP_AUTHORIZATION' not in request.META and not request.user.is_authenticated
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Para ViewSets del catálogo: cachea la respuesta completa de las lecturas
+    anónimas (GET) de las acciones de 'response_cache_ttls'
+    ({acción: (ttl, stale_ttl)} en segundos), por ruta y parámetros
+    normalizados. Si muchas peticiones iguales llegan juntas solo una
+    ejecuta la vista (ver cache.get_or_compute_response).
+    Los aciertos responden 304 contra el ETag de la entrada (calculada por
+    la vista completa, con los permisos de una petición anónima); los 304
+    que devuelve la vista no se guardan.
+    """
+    response_cache_ttls = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        ttls = self.response_cache_ttls.get(action) if request.method == 'GET' else None
+        if ttls is None or not _is_anonymous(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        computed = None
+
+        def compute(version):
+            nonlocal computed
+            computed = super(AnonymousResponseCacheMixin, self).dispatch(request, *args, **kwargs)
+            if computed.status_code >= 500 or computed.status_code == 304 or computed.streaming:
+                return None
+            if hasattr(computed, 'render'):
+                computed.render()
+            return {
+                'version': version,
+                'status': computed.status_code,
+                'content': computed.content,
+                'content_type': computed['Content-Type'],
+                'vary': computed.get('Vary'),
+                # El ETag de la versión con que se calculó (si se sirve vencida,
+                # el cliente no la guarda como si fuera la actual)
+                'etag': catalog_etag(request, version),
+            }
+
+        entry = get_or_compute_response(
+            f"{action}:{request_fingerprint(request)}", compute, *ttls
+        )
+        if entry is None:
+            return computed
+        response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+        if entry['vary']:
+            response['Vary'] = entry['vary']
+        if entry['status'] == 200:
+            if etag_matches(request, entry['etag']):
+                return not_modified(entry['etag'])
+            response['ETag'] = entry['etag']
+        return response
+
+
+class IntegerParamsMixin:
+    """ Lectura de parámetros enteros no negativos de la query (?limit=, ?offset=, ...). """
+
+    def _get_int_param(self, name, default, max_value=None):
+        value = self.request.query_params.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({name: 'Debe ser un número entero.'})
+        if value < 0:
+            raise ValidationError({name: 'Debe ser mayor o igual a 0.'})
+        return min(value, max_value) if max_value else value
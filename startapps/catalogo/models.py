@@ -2,11 +2,38 @@
 
 import uuid
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
-class Category(models.Model):
+
+def path_ids(path):
+    """ Ids de un materialized path ("1/5/12/" -> [1, 5, 12]), de la raíz hacia abajo. """
+    return [int(pk) for pk in path.split('/') if pk]
+
+
+class DerivedFieldsModel(models.Model):
+    """
+    DERIVED_FIELDS se actualizan con UPDATE ... F() desde otras tablas: un
+    save() normal (p. ej. al editar el objeto) no los pisa con un valor leído antes.
+    """
+    DERIVED_FIELDS = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class Category(DerivedFieldsModel):
     
     name = models.CharField(max_length=100, unique=True, verbose_name="Nombre")
     description = models.TextField(blank=True, null=True, verbose_name="Descripción")
@@ -18,6 +45,17 @@ class Category(models.Model):
         related_name='children', # Para encontrar los hijos: categoria.children.all()
         verbose_name="Categoría Padre"
     )
+    # Índice del árbol (materialized path): ids de los ancestros y el propio,
+    # ej. "1/5/12/". Permite leer cualquier subárbol con un solo LIKE 'prefijo%'.
+    path = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False, verbose_name="Profundidad")
+    # Productos de la categoría y de todo su subárbol (ver counts.py)
+    product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Productos")
+    subtree_product_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Productos (con subcategorías)"
+    )
+
+    DERIVED_FIELDS = ('product_count', 'subtree_product_count')
 
     class Meta:
         verbose_name = "Categoría"
@@ -28,6 +66,60 @@ class Category(models.Model):
             return f"{self.parent.name} -> {self.name}"
         return self.name
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'parent' in update_fields or not self.path:
+            self._update_tree_path()
+
+    def _update_tree_path(self):
+        """
+        Recalcula 'path' y 'depth' a partir del padre y, si cambiaron
+        (categoría nueva o movida), reescribe los de todo su subárbol.
+        """
+        parent = None
+        if self.parent_id:
+            parent = Category.objects.only('path', 'depth').get(pk=self.parent_id)
+            if self.path and parent.path.startswith(self.path):
+                raise ValueError("Una categoría no puede ser hija de sí misma ni de sus descendientes.")
+
+        new_path = f"{parent.path if parent else ''}{self.pk}/"
+        new_depth = parent.depth + 1 if parent else 0
+        if new_path == self.path and new_depth == self.depth:
+            return
+
+        old_path = self._previous_path = self.path
+        self.path, self.depth = new_path, new_depth
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            from .counts import move_subtree_count
+            Category.rebase_subtree(old_path, new_path, exclude_pk=self.pk)
+            move_subtree_count(self.pk, path_ids(old_path)[:-1], path_ids(new_path)[:-1])
+
+    @classmethod
+    def rebase_subtree(cls, old_prefix, new_prefix, exclude_pk=None):
+        """ Cambia el prefijo 'old_prefix' por 'new_prefix' en los descendientes. """
+        descendants = list(
+            cls.objects.filter(path__startswith=old_prefix).exclude(pk=exclude_pk).only('path', 'depth')
+        )
+        for node in descendants:
+            node.path = new_prefix + node.path[len(old_prefix):]
+            node.depth = node.path.count('/') - 1
+        cls.objects.bulk_update(descendants, ['path', 'depth'], batch_size=500)
+
+    def get_descendants(self, include_self=False):
+        """ Todo el subárbol en una sola consulta (sin recursión). """
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    @property
+    def ancestor_ids(self):
+        """ Ids de los ancestros (de la raíz hacia abajo), leídos del path. """
+        return path_ids(self.path)[:-1]
+
 class WarrantyProvider(models.Model):
 
     name = models.CharField(max_length=150, verbose_name="Nombre de la Empresa")
@@ -70,8 +162,14 @@ class Brand(models.Model):
         return self.name
 
 
-class Product(models.Model):
-    
+class Product(DerivedFieldsModel):
+
+    class ImageStatus(models.TextChoices):
+        NONE = 'none', 'Sin imagen'
+        PENDING = 'pending', 'Subiendo'
+        READY = 'ready', 'Lista'
+        FAILED = 'failed', 'Error al subir'
+
     name = models.CharField(max_length=255, verbose_name="Nombre del Producto")
     description = models.TextField(blank=True, verbose_name="Descripción")
     price = models.DecimalField(
@@ -103,12 +201,146 @@ class Product(models.Model):
         blank=True, 
         verbose_name="URL de Imagen"
     )
+    # La imagen se sube en segundo plano (ver uploads.py)
+    image_status = models.CharField(
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.NONE,
+        verbose_name="Estado de la Imagen"
+    )
+    # Derivados WebP de la imagen: {"thumb": url, "small": url, ...}
+    images = models.JSONField(default=dict, blank=True, verbose_name="Derivados de Imagen")
+    # Archivo en MEDIA_ROOT/spool que espera subirse (vacío cuando no hay ninguno)
+    image_spool = models.CharField(max_length=100, blank=True, default='', editable=False)
+    # Marca de agua de los trabajos incrementales (índice de similares)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Última Modificación")
+    # Ventas ponderadas con decaimiento (ver notas_ventas/popularity.py)
+    popularity_score = models.FloatField(default=0, verbose_name="Popularidad")
+
+    DERIVED_FIELDS = ('popularity_score',)
 
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
+        indexes = [
+            # ?ordering=popularity, solo o junto al filtro por categoría
+            models.Index(fields=['-popularity_score', '-id'], name='product_popularity_idx'),
+            models.Index(fields=['category', '-popularity_score', '-id'], name='product_cat_popularity_idx'),
+            # ?category= con rango de precio y/o ?ordering=price
+            models.Index(fields=['category', 'price', 'id'], name='product_cat_price_idx'),
+            # ?price__gte/lte= y ?ordering=price|-price sin categoría
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+            # ?ordering=name (cursor sobre name, id)
+            models.Index(fields=['name', 'id'], name='product_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class ProductDocument(models.Model):
+    """
+    Representación completa de un producto ya serializada (ver documents.py),
+    que los endpoints de lectura sirven tal cual.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='document'
+    )
+    data = models.JSONField()
+    # documents.DOCUMENT_VERSION con que se armó: los de otra versión se ignoran
+    version = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Documento de Producto"
+        verbose_name_plural = "Documentos de Productos"
+
+    def __str__(self):
+        return f"Documento de {self.product_id} (v{self.version})"
+
+
+class ProductNeighbor(models.Model):
+    """
+    Recomendaciones precalculadas: los productos más cercanos a cada
+    producto según un criterio ('kind'), ordenados por 'rank'.
+    Se llenan con trabajos batch (ver startapps/machin_learning).
+    """
+    class Kind(models.TextChoices):
+        BOUGHT_TOGETHER = 'bought_together', 'Comprados juntos'
+        SIMILAR = 'similar', 'Similares'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = "Producto Relacionado"
+        verbose_name_plural = "Productos Relacionados"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'neighbor'], name='unique_product_neighbor'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'kind', 'rank'], name='product_neighbor_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbor_id} ({self.kind})"
+
+
+class CatalogChange(models.Model):
+    """
+    Registro de cambios del catálogo (uno por escritura, en la misma
+    transacción). 'seq', el número de secuencia del feed /changes/, se
+    asigna después del commit (ver feed.publish_changes).
+    """
+    class Op(models.TextChoices):
+        UPSERT = 'upsert', 'Alta o modificación'
+        DELETE = 'delete', 'Baja'
+
+    entity = models.CharField(max_length=20, verbose_name="Entidad")
+    object_id = models.BigIntegerField(verbose_name="Id del Objeto")
+    op = models.CharField(max_length=10, choices=Op.choices, verbose_name="Operación")
+    seq = models.BigIntegerField(null=True, blank=True, unique=True, verbose_name="Secuencia")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Cambio del Catálogo"
+        verbose_name_plural = "Cambios del Catálogo"
+        indexes = [
+            # Los que todavía no se publicaron (sin seq)
+            models.Index(fields=['id'], condition=models.Q(seq__isnull=True), name='catalogchange_unpublished_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq or '-'} {self.op} {self.entity} {self.object_id}"
+
+
+class CatalogFeedState(models.Model):
+    """
+    Estado del feed (una sola fila): última secuencia publicada y hasta qué
+    secuencia se borró el registro (prune_catalog_changes).
+    """
+    last_seq = models.BigIntegerField(default=0)
+    pruned_seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Feed del catálogo: seq {self.last_seq} (borrado hasta {self.pruned_seq})"
+
+
+class StoredImage(models.Model):
+    """
+    Índice de imágenes ya subidas al storage, por hash de contenido.
+    Permite reutilizar la URL cuando se vuelve a subir la misma imagen.
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    url = models.URLField(max_length=1024, verbose_name="URL")
+    images = models.JSONField(default=dict, blank=True, verbose_name="Derivados")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Imagen Almacenada"
+        verbose_name_plural = "Imágenes Almacenadas"
+
+    def __str__(self):
+        return self.sha256
@@ -0,0 +1,149 @@
+# apps/products/refdata.py
+"""
+Caché por worker de las tablas de referencia del catálogo (Brand,
+WarrantyProvider, Warranty y Category).
+
+Son tablas chicas que casi no cambian: se cargan completas una vez por
+proceso y se usan para resolver FKs y para armar las representaciones
+anidadas de los productos sin consultas. Cada worker compara su copia con
+una versión compartida en la caché de Django como mucho cada
+REFDATA_CHECK_INTERVAL segundos, así que todos convergen en ese plazo
+después de una escritura.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Brand, Category, Warranty, WarrantyProvider
+from .tree import CATEGORY_TREE_FIELDS, build_category_tree
+
+REFDATA_VERSION_KEY = 'catalogo:refdata:version'
+REFERENCE_MODELS = (Brand, WarrantyProvider, Warranty, Category)
+# Campo con el que se busca cada modelo por nombre (importaciones)
+NAME_FIELDS = {Brand: 'name', WarrantyProvider: 'name', Warranty: 'title', Category: 'name'}
+
+
+def get_refdata_version():
+    version = cache.get(REFDATA_VERSION_KEY)
+    if version is None:
+        cache.add(REFDATA_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(REFDATA_VERSION_KEY)
+    return version
+
+
+def bump_refdata_version():
+    try:
+        cache.incr(REFDATA_VERSION_KEY)
+    except ValueError:
+        cache.add(REFDATA_VERSION_KEY, int(time.time() * 1000), timeout=None)
+    reference_data.invalidate()
+
+
+class _Snapshot:
+    def __init__(self, objects, representations):
+        self.objects = objects                  # modelo -> {pk: instancia}
+        self.representations = representations  # modelo -> {pk: dict serializado}
+        self.names = {}                         # modelo -> {nombre normalizado: [pks]}
+
+
+def _walk(nodes):
+    for node in nodes:
+        yield node
+        yield from _walk(node['children'])
+
+
+class ReferenceData:
+
+    def __init__(self, check_interval):
+        self._lock = threading.Lock()
+        self._check_interval = check_interval
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _load(self):
+        from .serializers import BrandSerializer, WarrantyProviderSerializer, WarrantySerializer
+
+        providers = {p.pk: p for p in WarrantyProvider.objects.order_by('id')}
+        warranties = {w.pk: w for w in Warranty.objects.order_by('id')}
+        for warranty in warranties.values():
+            warranty.provider = providers[warranty.provider_id]
+        brands = {b.pk: b for b in Brand.objects.order_by('id')}
+        categories = {c.pk: c for c in Category.objects.order_by('id')}
+
+        category_rows = [
+            {field: getattr(c, field) for field in CATEGORY_TREE_FIELDS} for c in categories.values()
+        ]
+        category_nodes = {node['id']: node for node in _walk(build_category_tree(category_rows))}
+
+        return _Snapshot(
+            objects={
+                Brand: brands,
+                WarrantyProvider: providers,
+                Warranty: warranties,
+                Category: categories,
+            },
+            representations={
+                Brand: {pk: BrandSerializer(b).data for pk, b in brands.items()},
+                WarrantyProvider: {pk: WarrantyProviderSerializer(p).data for pk, p in providers.items()},
+                Warranty: {pk: WarrantySerializer(w).data for pk, w in warranties.items()},
+                Category: category_nodes,
+            },
+        )
+
+    def _current(self, force_check=False):
+        now = time.monotonic()
+        if self._snapshot is not None and not force_check and now - self._checked_at < self._check_interval:
+            return self._snapshot
+
+        with self._lock:
+            version = get_refdata_version()
+            if self._snapshot is None or version != self._version:
+                self._snapshot = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """ Descarta la copia local (se recarga en el próximo uso). """
+        self._snapshot = None
+
+    def refresh(self):
+        """ Verifica ya la versión compartida, sin esperar el intervalo. """
+        self._current(force_check=True)
+
+    # --- Acceso ---
+
+    def _lookup(self, attribute, model, pk):
+        value = getattr(self._current(), attribute)[model].get(pk)
+        if value is None:
+            # Puede haberse creado en otro worker dentro del intervalo
+            value = getattr(self._current(force_check=True), attribute)[model].get(pk)
+        return value
+
+    def get(self, model, pk):
+        return self._lookup('objects', model, pk)
+
+    def representation(self, model, pk):
+        """ Mismo dict que produciría el serializer del modelo (no modificar). """
+        return self._lookup('representations', model, pk)
+
+    def representations(self, model):
+        return list(self._current().representations[model].values())
+
+    def name_index(self, model):
+        """ {nombre en minúsculas: [pks]}; más de un pk si el nombre se repite. """
+        snapshot = self._current()
+        index = snapshot.names.get(model)
+        if index is None:
+            index = {}
+            field = NAME_FIELDS[model]
+            for pk, instance in snapshot.objects[model].items():
+                index.setdefault(getattr(instance, field).strip().lower(), []).append(pk)
+            snapshot.names[model] = index
+        return index
+
+
+reference_data = ReferenceData(check_interval=getattr(settings, 'REFDATA_CHECK_INTERVAL', 5))
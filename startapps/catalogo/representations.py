@@ -0,0 +1,62 @@
+# apps/products/representations.py
+"""
+Camino rápido de solo lectura para listar productos: en vez de instanciar
+modelos y pasar por los serializers anidados, se lee una proyección
+values() y se arman los dicts directamente. Las relaciones anidadas salen
+ya serializadas de la caché de referencia. El resultado es idéntico (byte
+a byte, una vez renderizado) al de ProductSerializer.
+"""
+from functools import lru_cache
+
+from .models import Brand, Category, Warranty
+from .refdata import reference_data
+
+# Columnas necesarias para ProductSerializer (sin image_upload, que es write-only)
+PRODUCT_LIST_COLUMNS = (
+    'id', 'name', 'description', 'price', 'stock',
+    'category_id', 'warranty_id', 'brand_id', 'image_url', 'image_status', 'images',
+)
+
+
+@lru_cache(maxsize=None)
+def _price_to_representation():
+    # El mismo DecimalField que arma ProductSerializer (formato y redondeo)
+    from .serializers import ProductSerializer
+    return ProductSerializer().fields['price'].to_representation
+
+
+def represent_product_rows(rows):
+    """ rows: dicts de Product.objects.values(*PRODUCT_LIST_COLUMNS) """
+    price = _price_to_representation()
+    related = reference_data.representation
+    data = []
+    for row in rows:
+        category_id = row['category_id']
+        warranty_id = row['warranty_id']
+        brand_id = row['brand_id']
+        data.append({
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'price': price(row['price']),
+            'stock': row['stock'],
+            'category': related(Category, category_id) if category_id is not None else None,
+            'warranty': related(Warranty, warranty_id) if warranty_id is not None else None,
+            'brand': related(Brand, brand_id) if brand_id is not None else None,
+            'image_url': row['image_url'],
+            'image_status': row['image_status'],
+            'images': row['images'],
+        })
+    return data
+
+
+def represent_availability(rows, requested_ids):
+    """
+    rows: tuplas (id, stock, price). Devuelve {id: {stock, price}} con
+    None para los ids pedidos que no existen.
+    """
+    price = _price_to_representation()
+    data = {pk: None for pk in requested_ids}
+    for pk, stock, value in rows:
+        data[pk] = {'stock': stock, 'price': price(value)}
+    return data
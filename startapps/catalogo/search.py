@@ -0,0 +1,183 @@
+# apps/products/search.py
+"""
+Búsqueda full-text de productos (nombre, descripción, marca y categoría).
+
+- PostgreSQL: columna tsvector 'search_vector' en la tabla de productos con
+  índice GIN, ponderada (A: nombre, B: marca/categoría, C: descripción).
+- SQLite (fallback de desarrollo): tabla virtual FTS5 con rowid = id del producto.
+- Otros motores: icontains sin ranking.
+
+El índice se mantiene desde signals.py al guardar/borrar productos, marcas
+y categorías.
+"""
+import re
+import logging
+from django.db import connection, OperationalError
+from django.db.models import Q
+
+from .models import Product, Brand, Category
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'spanish'
+FTS_TABLE = 'catalogo_product_fts'
+GIN_INDEX = 'catalogo_product_search_gin'
+# Pesos de bm25 (SQLite) en el orden de las columnas de FTS_TABLE
+FTS_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+CHUNK_SIZE = 500
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tables():
+    return Product._meta.db_table, Brand._meta.db_table, Category._meta.db_table
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def parse_terms(query):
+    """ Normaliza la consulta a una lista de términos alfanuméricos. """
+    return _TERM_RE.findall(query.lower())
+
+
+# --- Creación del índice (usado por la migración) ---
+
+def create_search_index(conn=connection):
+    product, _, _ = _tables()
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE "{product}" ADD COLUMN IF NOT EXISTS search_vector tsvector')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON "{product}" USING GIN (search_vector)')
+        elif conn.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                    "name, brand, category, description, tokenize='unicode61 remove_diacritics 2')"
+                )
+            except OperationalError as e:
+                logger.warning(f"SQLite sin soporte FTS5, la búsqueda usará icontains: {e}")
+
+
+def drop_search_index(conn=connection):
+    product, _, _ = _tables()
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+            cursor.execute(f'ALTER TABLE "{product}" DROP COLUMN IF EXISTS search_vector')
+        elif conn.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _fts_available(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+# --- Mantenimiento del índice ---
+
+def _postgres_update_sql(where):
+    product, brand, category = _tables()
+    return (
+        f'UPDATE "{product}" AS p SET search_vector = '
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(p.name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((SELECT b.name FROM \"{brand}\" b WHERE b.id = p.brand_id), '')), 'B') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((SELECT c.name FROM \"{category}\" c WHERE c.id = p.category_id), '')), 'B') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(p.description, '')), 'C')"
+        f"{where}"
+    )
+
+
+def _sqlite_insert_sql(where):
+    product, brand, category = _tables()
+    return (
+        f"INSERT INTO {FTS_TABLE} (rowid, name, brand, category, description) "
+        f"SELECT p.id, p.name, coalesce(b.name, ''), coalesce(c.name, ''), coalesce(p.description, '') "
+        f'FROM "{product}" p '
+        f'LEFT JOIN "{brand}" b ON b.id = p.brand_id '
+        f'LEFT JOIN "{category}" c ON c.id = p.category_id'
+        f"{where}"
+    )
+
+
+def rebuild_search_index(conn=connection):
+    """ Recalcula el índice de todos los productos. """
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(_postgres_update_sql(''))
+        elif conn.vendor == 'sqlite' and _fts_available(conn):
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(_sqlite_insert_sql(''))
+
+
+def index_products(product_ids, conn=connection):
+    """ Re-indexa los productos indicados (altas, cambios o cambio de marca/categoría). """
+    with conn.cursor() as cursor:
+        for chunk in _chunks(product_ids):
+            if conn.vendor == 'postgresql':
+                cursor.execute(_postgres_update_sql(' WHERE p.id = ANY(%s)'), [chunk])
+            elif conn.vendor == 'sqlite' and _fts_available(conn):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(_sqlite_insert_sql(f' WHERE p.id IN ({placeholders})'), chunk)
+
+
+def remove_products(product_ids, conn=connection):
+    """ Quita productos borrados del índice (en PostgreSQL se van con la fila). """
+    if conn.vendor != 'sqlite' or not _fts_available(conn):
+        return
+    with conn.cursor() as cursor:
+        for chunk in _chunks(product_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+
+
+# --- Consulta ---
+
+def search_product_ids(query, limit=25, offset=0, conn=connection):
+    """
+    Devuelve los ids de los productos que coinciden con 'query', ordenados
+    por relevancia. Todos los términos deben aparecer (AND) y se aceptan
+    prefijos ("refri" encuentra "refrigerador").
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            tsquery = ' & '.join(f"'{term}':*" for term in terms)
+            product, _, _ = _tables()
+            cursor.execute(
+                f'SELECT p.id FROM "{product}" p, to_tsquery(%s, %s) query '
+                f'WHERE p.search_vector @@ query '
+                f'ORDER BY ts_rank_cd(p.search_vector, query) DESC, p.id '
+                f'LIMIT %s OFFSET %s',
+                [SEARCH_CONFIG, tsquery, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+        if conn.vendor == 'sqlite' and _fts_available(conn):
+            match = ' '.join(f'"{term}"*' for term in terms)
+            weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid '
+                f'LIMIT %s OFFSET %s',
+                [match, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    # Fallback sin índice (otros motores o SQLite sin FTS5)
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) | Q(description__icontains=term) |
+            Q(brand__name__icontains=term) | Q(category__name__icontains=term)
+        )
+    queryset = Product.objects.filter(condition).order_by('id').values_list('id', flat=True)
+    return list(queryset[offset:offset + limit])
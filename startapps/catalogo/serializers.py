@@ -1,8 +1,56 @@
 # apps/products/serializers.py
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import Category, WarrantyProvider, Warranty, Product, Brand
-from smartsales365.supabase_client import supabase
-import uuid
+from .refdata import reference_data
+from .fieldsets import SparseFieldsetSerializerMixin
+from .uploads import cancel_upload, find_stored_image, schedule_upload, spool_upload
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resuelve el id solo con la caché de datos de
+    referencia, sin consultas. La copia local se verifica contra la versión
+    compartida una vez por petición (en el primer campo que se valida), así
+    que un borrado hecho en otro worker ya se ve; si igual se cuela uno
+    entre la validación y el commit, ProductSerializer responde 400.
+    """
+    def run_validation(self, data=serializers.empty):
+        root = self.root
+        if not getattr(root, '_reference_data_checked', False):
+            reference_data.refresh()
+            root._reference_data_checked = True
+        return super().run_validation(data)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = reference_data.get(self.get_queryset().model, pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class ReferenceRepresentationField(serializers.Field):
+    """
+    Campo de solo lectura que anida la representación de una FK de referencia
+    (marca, categoría, garantía) tomándola ya serializada de la caché en
+    memoria, a partir de '<campo>_id' (sin joins ni serializers anidados).
+    """
+    def __init__(self, model, **kwargs):
+        self.model = model
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, pk):
+        return reference_data.representation(self.model, pk)
 
 class RecursiveCategorySerializer(serializers.Serializer):
     def to_representation(self, value):
@@ -14,21 +62,31 @@ class CategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'parent', 'children', 'description']
+        fields = ['id', 'name', 'parent', 'children', 'description', 'product_count', 'subtree_product_count']
+
+    def validate_parent(self, value):
+        # Evita ciclos en el árbol: no se puede colgar una categoría de sí misma
+        # ni de uno de sus descendientes
+        if value is not None and self.instance is not None and self.instance.path:
+            if value.path.startswith(self.instance.path):
+                raise serializers.ValidationError("No se puede asignar como padre una subcategoría propia.")
+        return value
 
-class WarrantyProviderSerializer(serializers.ModelSerializer):
+class WarrantyProviderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = WarrantyProvider
         fields = ['id', 'name', 'contact_email', 'contact_phone']
 
-class WarrantySerializer(serializers.ModelSerializer):
+class WarrantySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     provider = WarrantyProviderSerializer(read_only=True)
-    provider_id = serializers.PrimaryKeyRelatedField(
+    provider_id = ReferencePrimaryKeyRelatedField(
         queryset=WarrantyProvider.objects.all(), 
         source='provider', 
         write_only=True
     )
 
+    expandable_fields = {'provider': 'provider_id'}
+
     class Meta:
         model = Warranty
         fields = [
@@ -41,25 +99,27 @@ class BrandSerializer(serializers.ModelSerializer):
         model = Brand
         fields = ['id', 'name']
 
-class ProductSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
-    warranty = WarrantySerializer(read_only=True)
-    brand = BrandSerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    # Las relaciones anidadas salen de la caché de referencia (misma forma
+    # que CategorySerializer, WarrantySerializer y BrandSerializer)
+    category = ReferenceRepresentationField(Category)
+    warranty = ReferenceRepresentationField(Warranty)
+    brand = ReferenceRepresentationField(Brand)
+    category_id = ReferencePrimaryKeyRelatedField(
         queryset=Category.objects.all(),
         source='category',
         write_only=True,
         required=False,
         allow_null=True
     )
-    warranty_id = serializers.PrimaryKeyRelatedField(
+    warranty_id = ReferencePrimaryKeyRelatedField(
         queryset=Warranty.objects.all(),
         source='warranty',
         write_only=True,
         required=False,
         allow_null=True
     )
-    brand_id = serializers.PrimaryKeyRelatedField(
+    brand_id = ReferencePrimaryKeyRelatedField(
         queryset=Brand.objects.all(),
         source='brand',
         write_only=True,
@@ -67,12 +127,20 @@ class ProductSerializer(serializers.ModelSerializer):
         allow_null=True
     )
     image_url = serializers.URLField(read_only=True, allow_null=True)
+    image_status = serializers.CharField(read_only=True)
+    images = serializers.JSONField(read_only=True)
     image_upload = serializers.ImageField(
         write_only=True, 
         required=False, # Opcional
         allow_null=True
     )
 
+    expandable_fields = {
+        'category': 'category_id',
+        'warranty': 'warranty_id',
+        'brand': 'brand_id',
+    }
+
     class Meta:
         model = Product
         fields = [
@@ -87,71 +155,81 @@ class ProductSerializer(serializers.ModelSerializer):
             'brand_id',
             
             # Campos de imagen
-            'image_url',     
-            'image_upload'   
+            'image_url',
+            'image_status',
+            'images',
+            'image_upload'
         ]
 
-    def _upload_image_to_supabase(self, file):
-        # Tu bucket se llama 'products_images'
-        bucket_name = "products_image"
-        
-        # Genera un nombre de archivo único para evitar colisiones
-        # ej: products/f9e5b6f3-f8f6-4f8e-b8d9-f8f6f8f6f8f6.jpg
-        file_ext = file.name.split('.')[-1]
-        file_path = f"products/{uuid.uuid4()}.{file_ext}"
-        
+    def _spool_image(self, validated_data):
+        """
+        Guarda la imagen en disco y marca el producto como pendiente; la
+        subida al storage se hace en segundo plano tras el commit.
+        Si ya se subió una imagen con el mismo contenido, se reutiliza.
+        """
+        image_file = validated_data.pop('image_upload', None)
+        if not image_file:
+            return None
+        spooled = spool_upload(image_file)
+        stored = find_stored_image(spooled)
+        if stored is None:
+            validated_data['image_status'] = Product.ImageStatus.PENDING
+            validated_data['image_spool'] = spooled.name
+            return spooled
+        spooled.discard()
+        if self.instance is not None:
+            cancel_upload(self.instance.pk)
+        validated_data.update(
+            image_url=stored.url,
+            images=stored.images,
+            image_status=Product.ImageStatus.READY,
+            image_spool='',
+        )
+        return None
+
+    def _save_with_spool(self, spooled, save):
+        """
+        Corre save() y encola la subida; si falla, borra el archivo del spool.
+        Una FK a una fila borrada en otro worker después de validar falla al
+        commit (las FKs son diferidas) y se responde como 400.
+        """
         try:
-            # Sube el archivo
-            supabase.storage.from_(bucket_name).upload(
-                path=file_path,
-                file=file.read(), # Lee el contenido del archivo
-                file_options={"content-type": file.content_type}
+            with transaction.atomic():
+                product = save()
+                if spooled:
+                    schedule_upload(product.pk, spooled)
+        except IntegrityError:
+            if spooled:
+                spooled.discard()
+            raise serializers.ValidationError(
+                "La marca, categoría o garantía indicada ya no existe."
             )
-            
-            # Obtiene la URL pública
-            public_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
-            return public_url
-        
-        except Exception as e:
-            print(f"Error al subir a Supabase: {e}")
-            # Devuelve un error claro al frontend
-            raise serializers.ValidationError(f"Error al subir imagen: {e}")
+        except BaseException:
+            if spooled:
+                spooled.discard()
+            raise
+        return product
 
     def create(self, validated_data):
         """
         Sobrescribe el método CREATE
         """
-        image_file = validated_data.pop('image_upload', None)
-        
-        if image_file:
-            # Si se subió un archivo, súbelo a Supabase
-            image_url = self._upload_image_to_supabase(image_file)
-            if image_url:
-                # Y guarda la URL en el campo 'image_url'
-                validated_data['image_url'] = image_url
-                
+        spooled = self._spool_image(validated_data)
+
         # Crea el producto con el resto de los datos
         # (category y warranty se asignan gracias a 'source=')
-        product = Product.objects.create(**validated_data)
-        return product
+        return self._save_with_spool(spooled, lambda: Product.objects.create(**validated_data))
 
     def update(self, instance, validated_data):
         """
         Sobrescribe el método UPDATE
         """
-        image_file = validated_data.pop('image_upload', None)
-        
-        if image_file:
-            # Si se subió un NUEVO archivo...
-            # (Opcional: puedes borrar el archivo antiguo de Supabase aquí)
-            image_url = self._upload_image_to_supabase(image_file)
-            if image_url:
-                validated_data['image_url'] = image_url
-        
+        spooled = self._spool_image(validated_data)
+
         # Actualiza el producto con el resto de los datos
-        return super().update(instance, validated_data)
+        return self._save_with_spool(spooled, lambda: super(ProductSerializer, self).update(instance, validated_data))
 
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """ Serializador para listar, crear o modificar Marcas. """
     class Meta:
         # Asegúrate de que el modelo Brand ya esté importado
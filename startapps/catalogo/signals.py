@@ -0,0 +1,326 @@
+# apps/products/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import CatalogChange, Category, Brand, Product, Warranty, WarrantyProvider, path_ids
+from . import search
+from .cache import bump_catalog_version, invalidate_cached_products
+from .counts import adjust_category_counts, remove_subtree_count
+from .documents import build_documents, drop_documents
+from .feed import log_changes
+from .refdata import REFERENCE_MODELS, bump_refdata_version
+from .suggest import suggestion_index
+
+
+CATALOG_MODELS = (Category, WarrantyProvider, Warranty, Brand, Product)
+
+# Escrituras masivas (bulk_create/bulk_update/update) que no disparan
+# post_save: quien las hace la envía con sender=<modelo> y pks=[ids]
+catalog_bulk_write = Signal()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(catalog_bulk_write)
+def bump_version_on_catalog_write(sender, **kwargs):
+    """
+    Cualquier escritura en el catálogo invalida los ETags. Se hace tras el
+    commit para que nadie lea datos viejos etiquetados con la versión nueva.
+    """
+    if sender in CATALOG_MODELS:
+        transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_refdata_on_write(sender, **kwargs):
+    """
+    Avisa a todos los workers que recarguen sus tablas de referencia.
+    Se registra antes que las invalidaciones de productos para que, al
+    re-renderizar un producto, la versión nueva ya esté publicada.
+    """
+    if sender in REFERENCE_MODELS:
+        transaction.on_commit(bump_refdata_version)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    """
+    Al borrar una categoría sus hijos pasan a ser raíz (on_delete=SET_NULL),
+    así que se quita el prefijo del padre borrado del path de todo el subárbol.
+    """
+    if instance.path:
+        Category.rebase_subtree(instance.path, '', exclude_pk=instance.pk)
+
+
+# --- Conteo de productos por categoría ---
+
+@receiver(pre_save, sender=Product)
+def remember_previous_category(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'category' not in update_fields):
+        return
+    instance._previous_category_id = (
+        Product.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, created, **kwargs):
+    if created:
+        adjust_category_counts({instance.category_id: 1})
+        return
+    previous = instance.__dict__.pop('_previous_category_id', instance.category_id)
+    if previous != instance.category_id:
+        adjust_category_counts({previous: -1, instance.category_id: 1})
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    adjust_category_counts({instance.category_id: -1})
+
+
+@receiver(pre_delete, sender=Category)
+def remember_subtree_count(sender, instance, **kwargs):
+    # Valores actuales (la instancia pudo leerse antes de otras escrituras)
+    instance._subtree_count = (
+        Category.objects.filter(pk=instance.pk).values_list('path', 'subtree_product_count').first()
+    )
+
+
+@receiver(post_delete, sender=Category)
+def discount_deleted_category(sender, instance, **kwargs):
+    counted = getattr(instance, '_subtree_count', None)
+    if counted:
+        remove_subtree_count(*counted)
+
+
+# --- Índice de búsqueda full-text ---
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.index_products([pk]))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.remove_products([pk]))
+
+
+@receiver(catalog_bulk_write, sender=Product)
+def index_bulk_products(sender, pks, **kwargs):
+    pks = list(pks)
+    transaction.on_commit(lambda: search.index_products(pks))
+
+
+@receiver(pre_delete, sender=Brand)
+@receiver(pre_delete, sender=Category)
+def remember_products_for_reindex(sender, instance, **kwargs):
+    # Después del borrado los productos quedan con la FK en NULL y ya no
+    # se pueden encontrar, así que se guardan sus ids antes
+    instance._search_product_ids = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def reindex_related_products(sender, instance, **kwargs):
+    """ El nombre de la marca/categoría forma parte del documento indexado. """
+    product_ids = getattr(instance, '_search_product_ids', None)
+    if product_ids is None:
+        if kwargs.get('created'):
+            return
+        product_ids = list(instance.products.values_list('id', flat=True))
+    if product_ids:
+        transaction.on_commit(lambda: search.index_products(product_ids))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def touch_related_products(sender, instance, created=False, **kwargs):
+    """
+    El nombre de la marca/categoría es parte del texto del índice de
+    similares, que se actualiza por Product.updated_at.
+    """
+    if created:
+        return
+    product_ids = getattr(instance, '_search_product_ids', None)
+    products = Product.objects.filter(pk__in=product_ids) if product_ids is not None else instance.products.all()
+    products.update(updated_at=timezone.now())
+
+
+# --- Índice en memoria de autocompletado ---
+
+@receiver(post_save, sender=Product)
+def update_suggestion_index(sender, instance, **kwargs):
+    brand_name = instance.brand.name if instance.brand_id else None
+    transaction.on_commit(lambda: suggestion_index.upsert_product(
+        instance.pk, instance.name, instance.brand_id, brand_name
+    ))
+
+
+@receiver(catalog_bulk_write, sender=Product)
+def update_suggestion_index_bulk(sender, pks, **kwargs):
+    pks = list(pks)
+
+    def update():
+        rows = Product.objects.filter(pk__in=pks).values_list('id', 'name', 'brand_id', 'brand__name')
+        for pk, name, brand_id, brand_name in rows.iterator(chunk_size=2000):
+            suggestion_index.upsert_product(pk, name, brand_id, brand_name)
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_suggestion_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggestion_index.remove_product(pk))
+
+
+@receiver(post_save, sender=Brand)
+def rename_brand_in_suggestion_index(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: suggestion_index.update_brand(instance.pk, instance.name))
+
+
+@receiver(post_delete, sender=Brand)
+def drop_brand_from_suggestion_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggestion_index.update_brand(pk, None))
+
+
+# --- Caché del detalle y documentos precalculados de producto ---
+
+def rendered_product_ids(instance):
+    """
+    Productos cuya representación (ProductSerializer) incluye a 'instance'.
+    Una categoría aparece en los productos de ella misma y de sus ancestros
+    (cada producto anida su categoría con todo el subárbol de hijos).
+    """
+    if isinstance(instance, Category):
+        category_ids = {instance.pk, *instance.ancestor_ids}
+        previous_path = getattr(instance, '_previous_path', None)
+        if previous_path:
+            category_ids.update(int(pk) for pk in previous_path.split('/') if pk)
+        if instance.parent_id:
+            # En post_save el path todavía no se recalculó (categoría nueva o
+            # movida): los ancestros nuevos salen del path del padre
+            parent_path = Category.objects.filter(pk=instance.parent_id).values_list('path', flat=True).first()
+            category_ids.update(path_ids(parent_path or ''))
+        products = Product.objects.filter(category_id__in=category_ids)
+    elif isinstance(instance, Brand):
+        products = Product.objects.filter(brand_id=instance.pk)
+    elif isinstance(instance, Warranty):
+        products = Product.objects.filter(warranty_id=instance.pk)
+    elif isinstance(instance, WarrantyProvider):
+        products = Product.objects.filter(warranty__provider_id=instance.pk)
+    else:
+        return []
+    return list(products.values_list('id', flat=True))
+
+
+def refresh_rendered_products(product_ids):
+    """
+    Cambió la representación de estos productos: el documento se borra ya
+    (después del commit nadie lee uno viejo) y tras el commit se vacía la
+    caché del detalle y se regenera el documento con la referencia al día.
+    """
+    product_ids = list(product_ids)
+    drop_documents(product_ids)
+
+    def refresh():
+        invalidate_cached_products(product_ids)
+        build_documents(product_ids)
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=Product)
+def refresh_saved_product(sender, instance, **kwargs):
+    refresh_rendered_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_cached_product(sender, instance, **kwargs):
+    # El documento se borra con el producto (CASCADE)
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_products([pk]))
+
+
+@receiver(catalog_bulk_write, sender=Product)
+def refresh_bulk_products(sender, pks, **kwargs):
+    refresh_rendered_products(pks)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Brand)
+@receiver(pre_delete, sender=Warranty)
+@receiver(pre_delete, sender=WarrantyProvider)
+def remember_rendered_products(sender, instance, **kwargs):
+    # Igual que en el índice de búsqueda: tras el borrado ya no se encuentran
+    instance._rendered_product_ids = rendered_product_ids(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Warranty)
+@receiver(post_save, sender=WarrantyProvider)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Warranty)
+@receiver(post_delete, sender=WarrantyProvider)
+def invalidate_products_rendering(sender, instance, created=False, **kwargs):
+    if created and sender is not Category:
+        return
+    product_ids = getattr(instance, '_rendered_product_ids', None)
+    if product_ids is None:
+        product_ids = rendered_product_ids(instance)
+    if product_ids:
+        # Su representación anidada cambió: también van al feed de cambios
+        log_changes(Product, product_ids)
+        refresh_rendered_products(product_ids)
+
+
+# --- Feed de cambios (/export/ y /changes/) ---
+
+@receiver(post_save)
+def log_catalog_save(sender, instance, **kwargs):
+    # En la misma transacción que la escritura
+    if sender in CATALOG_MODELS:
+        log_changes(sender, [instance.pk])
+
+
+@receiver(post_delete)
+def log_catalog_delete(sender, instance, **kwargs):
+    if sender in CATALOG_MODELS:
+        log_changes(sender, [instance.pk], CatalogChange.Op.DELETE)
+
+
+@receiver(catalog_bulk_write)
+def log_catalog_bulk_write(sender, pks, **kwargs):
+    log_changes(sender, list(pks))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_child_categories(sender, instance, **kwargs):
+    instance._child_category_ids = list(instance.children.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def log_orphaned_categories(sender, instance, **kwargs):
+    """
+    Los hijos quedan con parent=NULL sin pasar por save(): cambia su
+    representación y la de los productos que la anidan.
+    """
+    child_ids = getattr(instance, '_child_category_ids', None)
+    if not child_ids:
+        return
+    product_ids = list(Product.objects.filter(category_id__in=child_ids).values_list('id', flat=True))
+    log_changes(Category, child_ids)
+    log_changes(Product, product_ids)
+    if product_ids:
+        refresh_rendered_products(product_ids)
@@ -0,0 +1,50 @@
+# apps/products/storage.py
+"""
+Backends de almacenamiento para las imágenes de productos.
+Se elige con settings.CATALOG_IMAGE_STORAGE (ruta a la clase).
+"""
+import shutil
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ImageStorage:
+    """ Interfaz: guarda un archivo local en 'path' y devuelve su URL pública. """
+
+    def save(self, path, local_path, content_type):
+        raise NotImplementedError
+
+
+class SupabaseImageStorage(ImageStorage):
+    bucket_name = "products_image"
+
+    def save(self, path, local_path, content_type):
+        # Import diferido: el cliente exige SUPABASE_URL/KEY al importarse
+        from smartsales365.supabase_client import supabase
+
+        bucket = supabase.storage.from_(self.bucket_name)
+        bucket.upload(
+            path=path,
+            file=Path(local_path),
+            # Los nombres son hashes de contenido: reescribir es idempotente
+            file_options={"content-type": content_type, "upsert": "true"}
+        )
+        return bucket.get_public_url(path)
+
+
+class LocalImageStorage(ImageStorage):
+    """ Guarda en MEDIA_ROOT (desarrollo y pruebas sin red). """
+
+    def save(self, path, local_path, content_type):
+        destination = Path(settings.MEDIA_ROOT) / path
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(local_path, destination)
+        return f"{settings.MEDIA_URL}{path}"
+
+
+@lru_cache(maxsize=None)
+def get_image_storage():
+    return import_string(settings.CATALOG_IMAGE_STORAGE)()
@@ -0,0 +1,262 @@
+# apps/products/suggest.py
+"""
+Índice en memoria para el autocompletado de productos.
+
+Se construye (una sola consulta) en segundo plano al arrancar el worker
+(AppConfig.ready) y después se mantiene incrementalmente desde signals.py,
+así que las consultas por pulsación de tecla no tocan la base de datos.
+Las escrituras de otros workers no pasan por estas señales: cuando vence,
+si la versión del catálogo cambió se reconstruye en segundo plano mientras
+se sigue sirviendo el anterior; si no cambió, solo se renueva. Tolera errores
+de tipeo ("refrigerdor samsng") comparando trigramas de cada palabra contra
+el vocabulario de nombres de producto y marca.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_catalog_version
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Similitud mínima (Jaccard de trigramas) para aceptar una palabra mal escrita
+MIN_SIMILARITY = 0.3
+
+
+def normalize(text):
+    """ 'Refrigerador Nó-Frost' -> ['refrigerador', 'no', 'frost'] """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return ''.join(ch if ch.isalnum() else ' ' for ch in text).split()
+
+
+@lru_cache(maxsize=100_000)
+def trigrams(token):
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SuggestionIndex:
+    """
+    Vocabulario de palabras -> productos, con dos accesos:
+    - lista ordenada de palabras para búsquedas por prefijo (bisect)
+    - trigrama -> palabras para encontrar palabras parecidas
+    """
+
+    def __init__(self, max_age=None):
+        self._lock = threading.RLock()
+        # Solo una reconstrucción a la vez (la primera bloquea; las demás van en segundo plano)
+        self._build_lock = threading.Lock()
+        self._max_age = max_age
+        self._built_at = None
+        self._version = None                 # versión del catálogo con la que se armó
+        self._journal = None                 # cambios recibidos durante una reconstrucción
+        self._docs = {}                      # id -> (name, brand_id, brand_name, tokens)
+        self._token_docs = defaultdict(set)  # palabra -> ids de producto
+        self._trigram_tokens = defaultdict(set)
+        self._sorted_tokens = []
+
+    # --- Construcción y mantenimiento ---
+
+    def _is_stale(self):
+        if self._built_at is None:
+            return True
+        return self._max_age is not None and time.monotonic() - self._built_at > self._max_age
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            # Primer uso: no hay un índice anterior que servir
+            with self._build_lock:
+                if self._built_at is None:
+                    self.rebuild()
+        elif self._is_stale() and self._build_lock.acquire(blocking=False):
+            # Vencido: se arma uno nuevo en otro hilo y mientras tanto se sirve el actual
+            threading.Thread(
+                target=self._refresh_in_background, name='suggest-rebuild', daemon=True
+            ).start()
+
+    def warm(self):
+        """ Construye el índice en otro hilo, para que el primer uso no espere. """
+        if self._built_at is None and self._build_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._refresh_in_background, name='suggest-warm', daemon=True
+            ).start()
+
+    def _refresh_in_background(self):
+        try:
+            if self._built_at is not None and get_catalog_version() == self._version:
+                # Nada cambió en el catálogo desde la última construcción
+                self._built_at = time.monotonic()
+            else:
+                self.rebuild()
+        except Exception:
+            logger.exception("No se pudo reconstruir el índice de autocompletado")
+        finally:
+            connections.close_all()
+            self._build_lock.release()
+
+    def rebuild(self):
+        """
+        Lee todos los productos en un índice nuevo, sin tomar el lock (las
+        consultas siguen usando el actual), y lo reemplaza de una vez. Los
+        cambios que llegan mientras tanto se anotan y se aplican al nuevo
+        antes del reemplazo.
+        """
+        with self._lock:
+            self._journal = []
+        try:
+            # Antes de leer: una escritura que llegue después cambia la versión
+            version = get_catalog_version()
+            fresh = SuggestionIndex()
+            rows = Product.objects.values_list('id', 'name', 'brand_id', 'brand__name')
+            for pk, name, brand_id, brand_name in rows.iterator(chunk_size=2000):
+                fresh._add(pk, name, brand_id, brand_name or '')
+            with self._lock:
+                for method, args in self._journal:
+                    getattr(fresh, method)(*args)
+                self._docs = fresh._docs
+                self._token_docs = fresh._token_docs
+                self._trigram_tokens = fresh._trigram_tokens
+                self._sorted_tokens = fresh._sorted_tokens
+                self._version = version
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def _apply(self, method, *args):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((method, args))
+            # Si todavía no se construyó, se leerá completo (y al día) en el primer uso
+            if self._built_at is not None:
+                getattr(self, method)(*args)
+
+    def _add(self, pk, name, brand_id, brand_name):
+        tokens = set(normalize(name)) | set(normalize(brand_name))
+        self._docs[pk] = (name, brand_id, brand_name, tokens)
+        for token in tokens:
+            if token not in self._token_docs:
+                bisect.insort(self._sorted_tokens, token)
+                for gram in trigrams(token):
+                    self._trigram_tokens[gram].add(token)
+            self._token_docs[token].add(pk)
+
+    def _remove(self, pk):
+        doc = self._docs.pop(pk, None)
+        if doc is None:
+            return
+        for token in doc[3]:
+            ids = self._token_docs.get(token)
+            if ids is None:
+                continue
+            ids.discard(pk)
+            if not ids:
+                del self._token_docs[token]
+                position = bisect.bisect_left(self._sorted_tokens, token)
+                if position < len(self._sorted_tokens) and self._sorted_tokens[position] == token:
+                    del self._sorted_tokens[position]
+                for gram in trigrams(token):
+                    self._trigram_tokens[gram].discard(token)
+                    if not self._trigram_tokens[gram]:
+                        del self._trigram_tokens[gram]
+
+    def _upsert(self, pk, name, brand_id, brand_name):
+        self._remove(pk)
+        self._add(pk, name, brand_id, brand_name)
+
+    def _update_brand(self, brand_id, brand_name):
+        affected = [(pk, doc[0]) for pk, doc in self._docs.items() if doc[1] == brand_id]
+        for pk, name in affected:
+            self._remove(pk)
+            if brand_name is None:
+                self._add(pk, name, None, '')
+            else:
+                self._add(pk, name, brand_id, brand_name)
+
+    def upsert_product(self, pk, name, brand_id, brand_name):
+        self._apply('_upsert', pk, name, brand_id, brand_name or '')
+
+    def remove_product(self, pk):
+        self._apply('_remove', pk)
+
+    def update_brand(self, brand_id, brand_name):
+        """ Renombrado (o borrado, con brand_name=None) de una marca. """
+        self._apply('_update_brand', brand_id, brand_name)
+
+    # --- Consulta ---
+
+    def _matching_tokens(self, term, as_prefix):
+        """ Palabras del vocabulario parecidas a 'term', con su similitud (0..1]. """
+        matches = {}
+        if as_prefix:
+            start = bisect.bisect_left(self._sorted_tokens, term)
+            for token in self._sorted_tokens[start:start + 200]:
+                if not token.startswith(term):
+                    break
+                matches[token] = 1.0
+
+        term_grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for token in self._trigram_tokens.get(gram, ()):
+                shared[token] += 1
+        for token, count in shared.items():
+            similarity = count / (len(term_grams) + len(trigrams(token)) - count)
+            if as_prefix and len(token) > len(term):
+                # Prefijo mal escrito: compara contra el inicio de la palabra
+                head_grams = trigrams(token[:len(term)])
+                head_shared = len(term_grams & head_grams)
+                similarity = max(similarity, head_shared / len(term_grams | head_grams))
+            if similarity >= MIN_SIMILARITY and similarity > matches.get(token, 0):
+                matches[token] = similarity
+        return matches
+
+    def suggest(self, text, limit=10):
+        terms = normalize(text)
+        if not terms:
+            return []
+        self._ensure_built()
+
+        with self._lock:
+            scores = defaultdict(float)
+            for position, term in enumerate(terms):
+                # La última palabra se está escribiendo: se acepta como prefijo
+                as_prefix = position == len(terms) - 1
+                best = {}
+                for token, similarity in self._matching_tokens(term, as_prefix).items():
+                    for pk in self._token_docs[token]:
+                        if similarity > best.get(pk, 0):
+                            best[pk] = similarity
+                for pk, similarity in best.items():
+                    scores[pk] += similarity
+
+            # Mejor puntaje primero; a igualdad, el nombre más corto (más exacto)
+            docs = self._docs
+            top = heapq.nsmallest(
+                limit, scores.items(),
+                key=lambda item: (-item[1], len(docs[item[0]][0]), item[0])
+            )
+            return [
+                {
+                    'id': pk,
+                    'name': self._docs[pk][0],
+                    'brand': self._docs[pk][2] or None,
+                    'score': round(score / len(terms), 3),
+                }
+                for pk, score in top
+            ]
+
+
+# Un índice por proceso (worker). SUGGEST_INDEX_MAX_AGE acota cuánto puede
+# tardar en ver cambios hechos por otros workers.
+suggestion_index = SuggestionIndex(max_age=getattr(settings, 'SUGGEST_INDEX_MAX_AGE', 300))
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .cache import RESPONSE_CACHE_KEY, RESPONSE_LOCK_KEY, get_or_compute_response
+
+
+class ResponseCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_callers_compute_once(self):
+        callers = 8
+        computed = []
+        barrier = threading.Barrier(callers)
+        results = [None] * callers
+
+        def compute(version):
+            computed.append(version)
+            # Da tiempo a que los demás lleguen mientras se calcula
+            time.sleep(0.2)
+            return {'version': version, 'body': 'respuesta'}
+
+        def call(position):
+            barrier.wait()
+            results[position] = get_or_compute_response('concurrente', compute, ttl=60, stale_ttl=60)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(computed), 1)
+        self.assertTrue(all(result['body'] == 'respuesta' for result in results))
+
+    def test_expired_lock_taken_by_another_worker_is_kept(self):
+        lock_key = RESPONSE_LOCK_KEY.format('vencido')
+
+        def compute(version):
+            # El lock venció durante el cálculo y otro worker lo tomó
+            cache.set(lock_key, 'otro-worker')
+            return {'version': version}
+
+        get_or_compute_response('vencido', compute, ttl=60, stale_ttl=60)
+
+        self.assertEqual(cache.get(lock_key), 'otro-worker')
+        self.assertIsNotNone(cache.get(RESPONSE_CACHE_KEY.format('vencido')))
+
+    def test_lock_is_released_after_computing(self):
+        get_or_compute_response('libre', lambda version: {'version': version}, ttl=60, stale_ttl=60)
+
+        self.assertIsNone(cache.get(RESPONSE_LOCK_KEY.format('libre')))
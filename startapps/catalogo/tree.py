@@ -0,0 +1,57 @@
+# apps/products/tree.py
+from .models import Category
+
+# Columnas necesarias para reproducir la salida de CategorySerializer
+CATEGORY_TREE_FIELDS = ('id', 'name', 'parent_id', 'description')
+# Conteos desnormalizados: solo en los endpoints de categorías (la categoría
+# anidada en cada producto no los lleva, para no cambiar con cada alta)
+CATEGORY_COUNT_FIELDS = ('product_count', 'subtree_product_count')
+
+
+def build_category_tree(rows):
+    """
+    Arma en memoria el árbol de categorías a partir de filas planas
+    (dicts con CATEGORY_TREE_FIELDS y opcionalmente CATEGORY_COUNT_FIELDS,
+    ordenadas por id).
+    Devuelve los nodos cuyo padre no está entre las filas (las "raíces" del
+    resultado), con la misma forma que CategorySerializer.
+    """
+    nodes = {}
+    for row in rows:
+        nodes[row['id']] = {
+            'id': row['id'],
+            'name': row['name'],
+            'parent': row['parent_id'],
+            'children': [],
+            'description': row['description'],
+        }
+        for field in CATEGORY_COUNT_FIELDS:
+            if field in row:
+                nodes[row['id']][field] = row[field]
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent'])
+        if parent is not None:
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+def get_category_tree(root=None, depth=None):
+    """
+    Lee el árbol completo (o el subárbol de 'root') con UNA sola consulta
+    usando el materialized path, opcionalmente limitado a 'depth' niveles
+    por debajo de la raíz.
+    """
+    queryset = Category.objects.all()
+    base_depth = 0
+    if root is not None:
+        queryset = queryset.filter(path__startswith=root.path)
+        base_depth = root.depth
+    if depth is not None:
+        queryset = queryset.filter(depth__lte=base_depth + depth)
+
+    rows = queryset.order_by('id').values(*CATEGORY_TREE_FIELDS, *CATEGORY_COUNT_FIELDS)
+    return build_category_tree(rows)
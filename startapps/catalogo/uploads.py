@@ -0,0 +1,257 @@
+# apps/products/uploads.py
+"""
+Subida de imágenes de productos en segundo plano.
+
+Las imágenes se guardan por hash de contenido (products/<sha256>.<ext>):
+si el hash ya está en StoredImage se reutiliza la URL sin volver a subir.
+
+El request solo copia el archivo a disco (spool) y guarda el producto con
+image_status=PENDING e image_spool=<archivo>; después del commit un hilo de
+fondo lo sube al storage configurado y actualiza image_url / image_status.
+Si el worker se cae o reinicia antes de terminar, el comando
+requeue_image_uploads retoma los productos que quedaron PENDING y borra
+los archivos del spool que ningún producto referencia.
+"""
+import hashlib
+import logging
+import mimetypes
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .images import IMAGE_DERIVATIVES, generate_derivatives
+from .models import Product, StoredImage
+from .storage import get_image_storage
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR = Path(settings.MEDIA_ROOT) / 'spool'
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'CATALOG_UPLOAD_WORKERS', 2),
+    thread_name_prefix='image-upload',
+)
+# Última subida encolada por producto en este proceso: si llegan dos
+# imágenes seguidas, la más vieja no se procesa. Entre procesos manda
+# Product.image_spool (ver _finish)
+_latest = {}
+_latest_lock = threading.Lock()
+
+
+class SpooledImage:
+    def __init__(self, path, extension, content_type, sha256):
+        self.path = path
+        self.extension = extension
+        self.content_type = content_type
+        self.sha256 = sha256
+
+    @property
+    def name(self):
+        return self.path.name
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_spooled(name):
+    """ El SpooledImage de un archivo del spool (None si ya no está). """
+    path = SPOOL_DIR / name
+    if not name or not path.is_file():
+        return None
+    extension = name.rsplit('.', 1)[-1]
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return SpooledImage(path, extension, content_type, _hash_file(path))
+
+
+def spool_upload(file):
+    """
+    Copia el archivo subido a disco por partes (sin leerlo entero en memoria)
+    calculando su hash en la misma pasada.
+    """
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    extension = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else 'bin'
+    path = SPOOL_DIR / f"{uuid.uuid4()}.{extension}"
+    digest = hashlib.sha256()
+    with open(path, 'wb') as destination:
+        for chunk in file.chunks():
+            digest.update(chunk)
+            destination.write(chunk)
+    return SpooledImage(path, extension, file.content_type, digest.hexdigest())
+
+
+def find_stored_image(spooled):
+    """
+    La imagen ya subida con el mismo contenido, si existe y tiene todos los
+    derivados; si le falta alguno se vuelve a procesar (y se completa).
+    """
+    stored = StoredImage.objects.filter(sha256=spooled.sha256).first()
+    if stored is None or not IMAGE_DERIVATIVES.keys() <= stored.images.keys():
+        return None
+    return stored
+
+
+def cancel_upload(product_id):
+    """ Descarta (tras el commit) el resultado de una subida en curso: llegó otra imagen. """
+    def cancel():
+        with _latest_lock:
+            _latest.pop(product_id, None)
+    transaction.on_commit(cancel)
+
+
+def schedule_upload(product_id, spooled):
+    """
+    Encola la subida cuando el producto ya está guardado (tras el commit).
+    Si la transacción se revierte no se anota nada; el archivo lo borra
+    quien llamó o, si eso no alcanza, requeue_image_uploads.
+    """
+    def enqueue():
+        with _latest_lock:
+            _latest[product_id] = spooled.path
+        _executor.submit(process_upload, product_id, spooled)
+    transaction.on_commit(enqueue)
+
+
+def _is_latest(product_id, spooled):
+    with _latest_lock:
+        return _latest.get(product_id) == spooled.path
+
+
+def _finish(product_id, spooled, **values):
+    with _latest_lock:
+        if _latest.get(product_id) != spooled.path:
+            return
+        _latest.pop(product_id)
+    # Solo si el producto sigue esperando este archivo (otro proceso pudo
+    # guardarle una imagen más nueva)
+    product = Product.objects.filter(pk=product_id, image_spool=spooled.name).first()
+    if product is None:
+        return
+    for field, value in values.items():
+        setattr(product, field, value)
+    # save() (y no update()) para que los signals invaliden cachés e índices
+    product.save(update_fields=list(values))
+
+
+def _store(spooled):
+    storage = get_image_storage()
+    name = spooled.sha256
+    url = storage.save(f"products/{name}.{spooled.extension}", spooled.path, spooled.content_type)
+    images = _upload_derivatives(storage, name, spooled)
+    if images is None:
+        # Sin derivados no se anota en el índice: la próxima subida del mismo
+        # contenido los vuelve a intentar en vez de reutilizar un mapa vacío
+        return StoredImage(sha256=spooled.sha256, url=url, images={})
+    # Solo con todos los derivados ya subidos (completa una entrada incompleta)
+    stored, _ = StoredImage.objects.update_or_create(
+        sha256=spooled.sha256, defaults={'url': url, 'images': images}
+    )
+    return stored
+
+
+def _upload_derivatives(storage, name, spooled):
+    """
+    Sube las miniaturas WebP. Si no se pueden generar devuelve None (el
+    producto se queda con el original); si falla la subida de alguna, la
+    excepción llega a process_upload y la subida queda FAILED.
+    """
+    try:
+        derivatives = generate_derivatives(spooled.path)
+    except Exception:
+        logger.exception(f"No se pudieron generar los derivados de {spooled.path}")
+        return None
+    try:
+        return {
+            key: storage.save(f"products/{name}_{key}.webp", local_path, 'image/webp')
+            for key, local_path in derivatives.items()
+        }
+    finally:
+        for local_path in derivatives.values():
+            Path(local_path).unlink(missing_ok=True)
+
+
+def process_upload(product_id, spooled):
+    close_old_connections()
+    try:
+        if not _is_latest(product_id, spooled):
+            return
+        # Otra subida con el mismo contenido pudo terminar mientras tanto
+        stored = find_stored_image(spooled) or _store(spooled)
+        _finish(
+            product_id, spooled,
+            image_url=stored.url, images=stored.images, image_status=Product.ImageStatus.READY,
+            image_spool='',
+        )
+        spooled.discard()
+    except Exception:
+        # El archivo queda en el spool (e image_spool apuntándolo) para poder reintentar
+        logger.exception(f"Error al subir la imagen del producto {product_id}")
+        _finish(product_id, spooled, image_status=Product.ImageStatus.FAILED)
+    finally:
+        close_old_connections()
+
+
+# --- Recuperación ---
+
+def requeue_stale_uploads(older_than, include_failed=False):
+    """
+    Retoma las subidas que quedaron colgadas (el worker que las tenía en
+    cola se reinició o se cayó): procesa en este proceso los productos
+    PENDING (y FAILED si include_failed) sin cambios hace más de
+    'older_than' (timedelta). Los que ya no tienen su archivo quedan FAILED.
+    Devuelve (reprocesados, sin archivo).
+    """
+    statuses = [Product.ImageStatus.PENDING]
+    if include_failed:
+        statuses.append(Product.ImageStatus.FAILED)
+    stale = (
+        Product.objects.filter(image_status__in=statuses, updated_at__lt=timezone.now() - older_than)
+        .exclude(image_spool='').values_list('id', 'image_spool')
+    )
+    requeued, lost = 0, 0
+    for product_id, name in list(stale):
+        spooled = load_spooled(name)
+        if spooled is None:
+            lost += 1
+            product = Product.objects.filter(pk=product_id, image_spool=name).first()
+            if product is not None:
+                product.image_status = Product.ImageStatus.FAILED
+                product.image_spool = ''
+                product.save(update_fields=['image_status', 'image_spool'])
+            continue
+        with _latest_lock:
+            _latest[product_id] = spooled.path
+        process_upload(product_id, spooled)
+        requeued += 1
+    return requeued, lost
+
+
+def sweep_spool(older_than):
+    """
+    Borra los archivos del spool con más de 'older_than' (timedelta) que
+    ningún producto referencia: imágenes de transacciones revertidas,
+    reemplazadas antes de subirse o derivados de una subida que falló.
+    """
+    if not SPOOL_DIR.exists():
+        return 0
+    referenced = set(Product.objects.exclude(image_spool='').values_list('image_spool', flat=True))
+    cutoff = time.time() - older_than.total_seconds()
+    removed = 0
+    for path in SPOOL_DIR.iterdir():
+        if path.is_file() and path.name not in referenced and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -10,6 +10,46 @@ urlpatterns = [
              'post': 'create'    # POST a /products/ -> crear producto
          }), 
          name='product-list'),
+
+    # GET /products/search/?q= -> búsqueda full-text por relevancia
+    path('products/search/',
+         views.ProductViewSet.as_view({'get': 'search'}),
+         name='product-search'),
+
+    # GET /products/suggest/?prefix= -> autocompletado (índice en memoria)
+    path('products/suggest/',
+         views.ProductViewSet.as_view({'get': 'suggest'}),
+         name='product-suggest'),
+
+    # GET /products/facets/ -> conteos por faceta con los filtros del listado
+    path('products/facets/',
+         views.ProductViewSet.as_view({'get': 'facets'}),
+         name='product-facets'),
+
+    # GET /products/availability/?ids=1,2 | POST {"ids": [...]} -> stock y precio
+    path('products/availability/',
+         views.ProductViewSet.as_view(
+             {'get': 'availability', 'post': 'availability'},
+             **views.ProductViewSet.availability.kwargs
+         ),
+         name='product-availability'),
+
+    # POST /products/import/ -> (Empleados) importación masiva CSV/NDJSON
+    path('products/import/',
+         views.ProductViewSet.as_view({'post': 'import_products'}, **views.ProductViewSet.import_products.kwargs),
+         name='product-import'),
+
+    # POST /products/bulk-update/ -> (Empleados) precio/stock de muchos productos
+    path('products/bulk-update/',
+         views.ProductViewSet.as_view({'post': 'bulk_update'}),
+         name='product-bulk-update'),
+
+    # GET /products/cache-stats/ -> (Admin) aciertos/fallos de la caché de detalle
+    # (las opciones del @action, como permission_classes, solo las aplica
+    # un router: con rutas explícitas hay que pasarlas a as_view)
+    path('products/cache-stats/',
+         views.ProductViewSet.as_view({'get': 'cache_stats'}, **views.ProductViewSet.cache_stats.kwargs),
+         name='product-cache-stats'),
     
     path('products/<int:pk>/', 
          views.ProductViewSet.as_view({
@@ -20,6 +60,16 @@ urlpatterns = [
          }), 
          name='product-detail'),
 
+    # GET /products/1/related/ -> "comprados juntos" (precalculado)
+    path('products/<int:pk>/related/',
+         views.ProductViewSet.as_view({'get': 'related'}),
+         name='product-related'),
+
+    # GET /products/1/similar/ -> similares por contenido (precalculado)
+    path('products/<int:pk>/similar/',
+         views.ProductViewSet.as_view({'get': 'similar'}),
+         name='product-similar'),
+
     # --- Rutas de Categorías ---
     path('categories/', 
          views.CategoryViewSet.as_view({
@@ -74,5 +124,10 @@ urlpatterns = [
 
     path('brands/', views.BrandListCreateView.as_view(), name='brand-list-create'),
     path('brands/<int:pk>/', views.BrandRetrieveUpdateDestroyView.as_view(), name='brand-detail'),
+
+    # --- Réplica del catálogo ---
+    # GET /export/ -> snapshot NDJSON; GET /changes/?since=<seq> -> cambios posteriores
+    path('export/', views.CatalogExportView.as_view(), name='catalog-export'),
+    path('changes/', views.CatalogChangesView.as_view(), name='catalog-changes'),
 ]
 
@@ -1,18 +1,46 @@
 # apps/productos/views.py
 from rest_framework import viewsets
 from rest_framework import generics
-from .models import Category, WarrantyProvider, Warranty, Product
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny, IsAdminUser
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from .models import Category, WarrantyProvider, Warranty, Product, ProductNeighbor
 from .serializers import (
     CategorySerializer, WarrantyProviderSerializer, 
     WarrantySerializer, ProductSerializer
 )
 from startapps.usuarios.permissions import IsEmployeeOrReadOnly # <-- IMPORTAMOS EL PERMISO
+from smartsales365.pagination import KeysetPagination
 from .models import Brand
 from startapps.catalogo.serializers import BrandSerializer
+from .bulk import MAX_BULK_UPDATE_ITEMS, ProductBulkUpdateItemSerializer, bulk_update_products
+from .cache import get_cached_product, set_cached_product, product_cache_stats
+from .documents import get_document, get_documents
+from .facets import get_facets
+from .feed import MAX_CHANGES, ChangesPruned, export_lines, get_changes, publish_changes
+from .fieldsets import get_fieldset, trim_representation
+from .filters import ProductFilter
+from .importer import ProductImport, detect_format, read_rows
+from .mixins import AnonymousResponseCacheMixin, CatalogETagMixin, IntegerParamsMixin
+from .refdata import reference_data
+from .representations import PRODUCT_LIST_COLUMNS, represent_availability, represent_product_rows
+from .search import search_product_ids
+from .suggest import suggestion_index
+from .tree import get_category_tree
 
 # --- Vistas para el Catálogo de Productos ---
 
-class CategoryViewSet(viewsets.ModelViewSet):
+# Tope de ids por consulta de disponibilidad (carritos grandes usan POST)
+MAX_AVAILABILITY_IDS = 1000
+
+class CategoryViewSet(CatalogETagMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     """
     Endpoint para Categorías (CRUD).
     - LECTURA: Todos
@@ -21,8 +49,69 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.filter(parent=None) # Mostramos solo las de nivel raíz
     serializer_class = CategorySerializer
     permission_classes = [IsEmployeeOrReadOnly] # <-- APLICADO
+    # Lecturas anónimas cacheadas: {acción: (segundos fresca, segundos extra vencida)}
+    response_cache_ttls = {'list': (60, 120)}
+
+    def _get_depth_param(self):
+        depth = self.request.query_params.get('depth')
+        if depth in (None, ''):
+            return None
+        try:
+            depth = int(depth)
+        except ValueError:
+            raise ValidationError({'depth': 'Debe ser un número entero.'})
+        if depth < 0:
+            raise ValidationError({'depth': 'Debe ser mayor o igual a 0.'})
+        return depth
+
+    def list(self, request, *args, **kwargs):
+        """
+        Devuelve el árbol leído en una sola consulta y armado en memoria
+        (en vez de una consulta por nivel con el serializer recursivo).
+        - ?root=<id>: solo el subárbol de esa categoría
+        - ?depth=N: solo N niveles por debajo de la raíz
+        """
+        root = None
+        root_id = request.query_params.get('root')
+        if root_id:
+            if not root_id.isdigit():
+                raise ValidationError({'root': 'Debe ser un id de categoría.'})
+            root = get_object_or_404(Category, pk=root_id)
 
-class WarrantyProviderViewSet(viewsets.ModelViewSet):
+        tree = get_category_tree(root=root, depth=self._get_depth_param())
+        fields, expand = get_fieldset(request)
+        tree = [trim_representation(node, fields, expand, children_key='children') for node in tree]
+        page = self.paginate_queryset(tree)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(tree)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        tree = get_category_tree(root=instance, depth=self._get_depth_param())
+        fields, expand = get_fieldset(request)
+        return Response(trim_representation(tree[0], fields, expand, children_key='children'))
+
+class ReferenceDataListMixin:
+    """
+    El listado sale directo de la caché de referencia en memoria
+    (sin consultas ni serializers); la escritura sigue yendo a la base.
+    """
+    reference_model = None
+
+    def list(self, request, *args, **kwargs):
+        data = reference_data.representations(self.reference_model)
+        fields, expand = get_fieldset(request)
+        if fields is not None or expand is not None:
+            expandable = getattr(self.get_serializer_class(), 'expandable_fields', {})
+            data = [trim_representation(row, fields, expand, expandable) for row in data]
+        page = self.paginate_queryset(data)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(data)
+
+
+class WarrantyProviderViewSet(CatalogETagMixin, ReferenceDataListMixin, viewsets.ModelViewSet):
     """
     Endpoint para Proveedores de Garantía (CRUD).
     - LECTURA: Todos
@@ -31,8 +120,9 @@ class WarrantyProviderViewSet(viewsets.ModelViewSet):
     queryset = WarrantyProvider.objects.all()
     serializer_class = WarrantyProviderSerializer
     permission_classes = [IsEmployeeOrReadOnly] # <-- APLICADO
+    reference_model = WarrantyProvider
 
-class WarrantyViewSet(viewsets.ModelViewSet):
+class WarrantyViewSet(CatalogETagMixin, ReferenceDataListMixin, viewsets.ModelViewSet):
     """
     Endpoint para Plantillas de Garantía (CRUD).
     - LECTURA: Todos
@@ -41,8 +131,9 @@ class WarrantyViewSet(viewsets.ModelViewSet):
     queryset = Warranty.objects.all()
     serializer_class = WarrantySerializer
     permission_classes = [IsEmployeeOrReadOnly] # <-- APLICADO
+    reference_model = Warranty
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogETagMixin, AnonymousResponseCacheMixin, IntegerParamsMixin, viewsets.ModelViewSet):
     """
     Endpoint para Productos (CRUD).
     - LECTURA: Todos (con filtrado)
@@ -51,27 +142,299 @@ class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsEmployeeOrReadOnly] # <-- APLICADO
+    pagination_class = KeysetPagination # ?cursor= activa la paginación por cursor
+    # ETag/304 solo en lecturas del contenido del catálogo (no en cache-stats,
+    # availability con el stock en vivo, ni suggest, que sigue su propio índice)
+    etag_actions = ('list', 'retrieve', 'search', 'facets', 'related', 'similar')
+    # Lecturas anónimas cacheadas: {acción: (segundos fresca, segundos extra vencida)}
+    # (el detalle ya tiene su caché por producto)
+    response_cache_ttls = {
+        'list': (30, 60),
+        'search': (30, 60),
+        'facets': (60, 120),
+        'related': (300, 600),
+        'similar': (300, 600),
+    }
+
+    # Órdenes permitidos en ?ordering= (siempre terminan en 'id' para ser estables)
+    ORDERINGS = {
+        'id': ('id',),
+        'name': ('name', 'id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'popularity': ('-popularity_score', '-id'), # más vendidos (con decaimiento) primero
+    }
+    # Columna que necesita cada relación anidada de ProductSerializer
+    RELATION_COLUMNS = {'category': 'category_id', 'warranty': 'warranty_id', 'brand': 'brand_id'}
     
     # --- ¡FILTRADO! ---
     # Esto activa django-filter para este ViewSet
-    filterset_fields = {
-        'category': ['exact'], # Filtra por ID de categoría
-        'category__parent': ['exact'], # Filtra por ID de la categoría padre
-        'price': ['gte', 'lte'], # Filtra por precio (ej. price__gte=100)
-    }
+    # (category, category__parent, price__gte/lte y category_tree)
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ProductFilter
+
+    def get_keyset_ordering(self, request):
+        ordering = request.query_params.get('ordering') or 'id'
+        if ordering not in self.ORDERINGS:
+            raise ValidationError({'ordering': f"Valores permitidos: {', '.join(self.ORDERINGS)}"})
+        return self.ORDERINGS[ordering]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ordering = ()
+        if self.action == 'list':
+            ordering = self.get_keyset_ordering(self.request)
+            queryset = queryset.order_by(*ordering)
+
+        # ?fields= -> solo se leen las columnas necesarias (ej. sin 'description')
+        fields, _ = get_fieldset(self.request)
+        if fields is not None and self.action in ('list', 'retrieve', 'search'):
+            concrete = {f.name for f in Product._meta.concrete_fields}
+            columns = {'id', *(field.lstrip('-') for field in ordering)}
+            for name in fields:
+                if name in self.RELATION_COLUMNS:
+                    columns.add(self.RELATION_COLUMNS[name])
+                elif name in concrete:
+                    columns.add(name)
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado por el camino rápido (proyección values() + dicts armados a
+        mano, misma salida que ProductSerializer). Con ?fields= / ?expand=
+        se usa el serializer normal.
+        """
+        fields, expand = get_fieldset(request)
+        if fields is not None or expand is not None:
+            return super().list(request, *args, **kwargs)
+
+        # El cursor de KeysetPagination lee las columnas del orden
+        ordering = [field.lstrip('-') for field in self.get_keyset_ordering(request)]
+        columns = [*PRODUCT_LIST_COLUMNS, *(f for f in ordering if f not in PRODUCT_LIST_COLUMNS)]
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(represent_product_rows(page))
+        return Response(represent_product_rows(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalle de producto: caché read-through sobre el documento
+        precalculado (ver documents.py), sin joins ni serializers anidados.
+        Ambos se invalidan por signals al cambiar el producto, su categoría,
+        marca, garantía o proveedor.
+        """
+        data = get_cached_product(kwargs['pk'])
+        if data is None:
+            # Se cachea completo (sin el recorte de ?fields=, que se aplica después)
+            data = get_document(int(kwargs['pk']))
+            if data is None:
+                raise NotFound()
+            set_cached_product(data['id'], data)
+        fields, expand = get_fieldset(request)
+        return Response(trim_representation(data, fields, expand, ProductSerializer.expandable_fields))
+
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """ (Solo Admin) Aciertos/fallos de la caché del detalle de producto. """
+        return Response(product_cache_stats())
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Búsqueda full-text ordenada por relevancia.
+        GET /products/search/?q=refrigerador samsung&limit=25&offset=0
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Debe indicar un texto de búsqueda.'})
+        limit = self._get_int_param('limit', 25, max_value=100) or 25
+        offset = self._get_int_param('offset', 0)
 
-class BrandListCreateView(generics.ListCreateAPIView):
+        # Se pide uno de más para saber si hay otra página sin hacer un COUNT
+        ids = search_product_ids(query, limit=limit + 1, offset=offset)
+        has_more = len(ids) > limit
+        ids = ids[:limit]
+
+        documents = get_documents(ids)
+        fields, expand = get_fieldset(request)
+        results = [
+            trim_representation(documents[pk], fields, expand, ProductSerializer.expandable_fields)
+            for pk in ids if pk in documents
+        ]
+        return Response({
+            'query': query,
+            'offset': offset,
+            'next_offset': offset + limit if has_more else None,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Autocompletado tolerante a errores de tipeo, servido desde memoria.
+        GET /products/suggest/?prefix=refrigerdor samsng&limit=10
+        """
+        prefix = request.query_params.get('prefix', '').strip()
+        if not prefix:
+            return Response([])
+        limit = self._get_int_param('limit', 10, max_value=20) or 10
+        return Response(suggestion_index.suggest(prefix, limit=limit))
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Conteos por marca, categoría, garantía y rango de precio para los
+        mismos filtros que el listado (ej. /products/facets/?category_tree=3).
+        Se cachean por filtros y se invalidan con la versión del catálogo.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_facets(queryset, request.query_params))
+
+    def _neighbors_response(self, pk, kind):
+        """ Vecinos precalculados de un producto, en el formato del listado. """
+        if not Product.objects.filter(pk=pk).exists():
+            raise NotFound()
+        limit = self._get_int_param('limit', 10, max_value=50) or 10
+        ids = list(
+            ProductNeighbor.objects.filter(product_id=pk, kind=kind)
+            .order_by('rank').values_list('neighbor_id', flat=True)[:limit]
+        )
+        documents = get_documents(ids)
+        return Response([documents[pk] for pk in ids if pk in documents])
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """
+        "Comprados juntos": productos que más veces aparecen en las mismas
+        ventas (precalculado por el comando build_related_products).
+        GET /products/<id>/related/?limit=10
+        """
+        return self._neighbors_response(pk, ProductNeighbor.Kind.BOUGHT_TOGETHER)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Productos parecidos por nombre, marca, categoría y descripción
+        (precalculado por el comando build_similar_products).
+        GET /products/<id>/similar/?limit=10
+        """
+        return self._neighbors_response(pk, ProductNeighbor.Kind.SIMILAR)
+
+    @action(detail=False, methods=['get', 'post'], permission_classes=[AllowAny])
+    def availability(self, request):
+        """
+        Stock y precio actuales de varios productos, para el carrito.
+        GET /products/availability/?ids=1,2,3  o  POST {"ids": [1, 2, 3]}
+        Responde {"1": {"stock": 5, "price": "10.00"}, "2": null, ...}
+        """
+        if request.method == 'POST':
+            raw_ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        else:
+            raw_ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        if not isinstance(raw_ids, list) or not raw_ids:
+            raise ValidationError({'ids': 'Debe indicar una lista de ids.'})
+        if len(raw_ids) > MAX_AVAILABILITY_IDS:
+            raise ValidationError({'ids': f'Como máximo {MAX_AVAILABILITY_IDS} ids por consulta.'})
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in raw_ids))
+        except (TypeError, ValueError):
+            raise ValidationError({'ids': 'Los ids deben ser números enteros.'})
+
+        rows = Product.objects.filter(pk__in=ids).values_list('id', 'stock', 'price')
+        return Response(represent_availability(rows, ids))
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_products(self, request):
+        """
+        (Solo Empleados) Importación masiva desde un archivo CSV o NDJSON
+        en el campo 'file'. Con ?dry_run=1 solo valida.
+        Devuelve cuántos se crearon/actualizaron y los errores por fila.
+        """
+        file = request.FILES.get('file')
+        if file is None:
+            raise ValidationError({'file': 'Debe adjuntar un archivo CSV o NDJSON.'})
+        file_format = detect_format(file)
+        if file_format is None:
+            raise ValidationError({'file': 'Formato no soportado (use .csv o .ndjson).'})
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        report = ProductImport(dry_run=dry_run).run(read_rows(file, file_format))
+        return Response(report)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        (Solo Empleados) Actualiza precio y/o stock de muchos productos en una
+        transacción. Body: [{"id": 1, "price": "10.00", "stock": 5}, ...]
+        (como máximo MAX_BULK_UPDATE_ITEMS ítems)
+        """
+        serializer = ProductBulkUpdateItemSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=MAX_BULK_UPDATE_ITEMS,
+        )
+        serializer.is_valid(raise_exception=True)
+        updated, missing = bulk_update_products(serializer.validated_data)
+        return Response({'updated': len(updated), 'missing': missing})
+
+class BrandListCreateView(CatalogETagMixin, ReferenceDataListMixin, generics.ListCreateAPIView):
     """ Listar todas las marcas (ReadOnly para todos) o crear una nueva (solo Employee). """
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
+    reference_model = Brand
     # Aplicamos el permiso que permite GET a todos y POST solo a Empleados
     permission_classes = [IsEmployeeOrReadOnly] 
 
 
-class BrandRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class BrandRetrieveUpdateDestroyView(CatalogETagMixin, generics.RetrieveUpdateDestroyAPIView):
     """ Obtener detalles, actualizar o eliminar una marca específica (solo Employee). """
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     # Aplicamos el permiso que permite ver a todos y editar/borrar solo a Empleados
     permission_classes = [IsEmployeeOrReadOnly]
 
+
+# --- Réplica del catálogo (marketplaces, app offline) ---
+
+class CatalogExportView(APIView):
+    """
+    Snapshot completo del catálogo en NDJSON (GET /export/).
+    La primera línea trae la secuencia desde la que hay que seguir con /changes/.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        seq = publish_changes()
+        response = StreamingHttpResponse(export_lines(seq), content_type='application/x-ndjson')
+        response['X-Catalog-Seq'] = str(seq)
+        return response
+
+
+class CatalogChangesView(IntegerParamsMixin, APIView):
+    """
+    Cambios del catálogo posteriores a una secuencia: GET /changes/?since=<seq>&limit=
+    Cada objeto aparece una vez con su último estado ('upsert' con 'data', o
+    'delete'). Se sigue pidiendo con since=next_since mientras has_more sea true.
+    Si 'since' es anterior al registro conservado responde 410 (volver a /export/).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        if request.query_params.get('since') in (None, ''):
+            raise ValidationError({'since': 'Indique la secuencia del snapshot o de la última consulta.'})
+        since = self._get_int_param('since', 0)
+        limit = self._get_int_param('limit', MAX_CHANGES, max_value=MAX_CHANGES) or MAX_CHANGES
+        try:
+            changes, next_since, has_more = get_changes(since, limit)
+        except ChangesPruned as exc:
+            # Lo que falta ya se borró del registro: hay que volver a bajar el snapshot
+            return Response(
+                {'detail': 'La secuencia es anterior al registro que se conserva; descargue /export/ de nuevo.',
+                 'pruned_seq': exc.pruned_seq},
+                status=status.HTTP_410_GONE,
+            )
+        return Response({
+            'since': since,
+            'next_since': next_since,
+            'has_more': has_more,
+            'changes': changes,
+        })
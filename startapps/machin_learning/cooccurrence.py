@@ -0,0 +1,107 @@
+# apps/ai/cooccurrence.py
+"""
+"Comprados juntos": matriz dispersa de co-ocurrencia producto x producto
+armada con las ventas completadas (SaleDetail).
+
+C[i, j] = cantidad de ventas que incluyen a i y a j (C[i, i] = ventas de i).
+La matriz y la última venta procesada (watermark) se guardan en un .npz,
+así cada corrida solo suma las ventas nuevas: C += B.T @ B, con B la matriz
+de incidencia venta x producto de esas ventas. Como el puntaje es el conteo,
+solo cambian los top-K de los productos que aparecen en ventas nuevas.
+"""
+import os
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from scipy import sparse
+
+from startapps.catalogo.models import ProductNeighbor
+from startapps.notas_ventas.models import Sale, SaleDetail
+from .neighbors import store_neighbors, top_k_by_row
+
+STATE_PATH = getattr(
+    settings, 'COOCCURRENCE_STATE_PATH',
+    os.path.join(os.path.dirname(__file__), 'data/cooccurrence.npz'),
+)
+DEFAULT_TOP_K = 10
+# Las ventas más recientes que esto se dejan para la próxima corrida: una
+# transacción con un id menor podría no haber hecho commit todavía
+SAFETY_LAG = timedelta(minutes=1)
+
+
+def load_state(path=STATE_PATH):
+    """ (matriz csr, watermark); matriz vacía si no hay estado guardado. """
+    if not os.path.exists(path):
+        return sparse.csr_matrix((0, 0), dtype=np.int64), 0
+    with np.load(path) as state:
+        matrix = sparse.csr_matrix(
+            (state['data'], state['indices'], state['indptr']), shape=tuple(state['shape'])
+        )
+        return matrix, int(state['watermark'])
+
+
+def save_state(matrix, watermark, path=STATE_PATH):
+    # Se escribe a un temporal y se renombra: nunca queda un estado a medias
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+        shape=np.array(matrix.shape), watermark=np.array(watermark),
+    )
+    os.replace(tmp_path, path)
+
+
+def _resize(matrix, size):
+    if matrix.shape[0] >= size:
+        return matrix
+    matrix = matrix.tocsr(copy=True)
+    matrix.resize((size, size))
+    return matrix
+
+
+def new_sales_details(watermark):
+    """ (sale_id, product_id) de ventas completadas posteriores al watermark. """
+    return SaleDetail.objects.filter(
+        sale__status=Sale.SaleStatus.COMPLETED,
+        sale_id__gt=watermark,
+        sale__created_at__lt=timezone.now() - SAFETY_LAG,
+    ).values_list('sale_id', 'product_id')
+
+
+def cooccurrence_delta(pairs, size):
+    """ B.T @ B para las ventas de 'pairs' (cada producto cuenta una vez por venta). """
+    sale_ids, product_ids = pairs
+    _, sale_rows = np.unique(sale_ids, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(product_ids), dtype=np.int64), (sale_rows, product_ids)),
+        shape=(sale_rows.max() + 1, size),
+    )
+    incidence.data[:] = 1  # un producto repetido en la misma venta suma 1
+    return (incidence.T @ incidence).tocsr()
+
+
+def refresh_bought_together(top_k=DEFAULT_TOP_K, full=False, path=STATE_PATH):
+    """
+    Suma las ventas nuevas a la matriz y recalcula los top-K de los
+    productos afectados. Con full=True reconstruye desde cero.
+    Devuelve (ventas procesadas, productos actualizados).
+    """
+    matrix, watermark = (sparse.csr_matrix((0, 0), dtype=np.int64), 0) if full else load_state(path)
+
+    rows = np.array(list(new_sales_details(watermark).iterator(chunk_size=5000)), dtype=np.int64)
+    if not len(rows):
+        return 0, 0
+    sale_ids, product_ids = rows[:, 0], rows[:, 1]
+
+    size = max(matrix.shape[0], int(product_ids.max()) + 1)
+    matrix = _resize(matrix, size) + cooccurrence_delta((sale_ids, product_ids), size)
+    matrix = matrix.tocsr()
+
+    affected = np.unique(product_ids)
+    neighbors = top_k_by_row(matrix, affected, top_k)
+    store_neighbors(ProductNeighbor.Kind.BOUGHT_TOGETHER, neighbors, replace_all=full)
+
+    save_state(matrix, int(sale_ids.max()), path)
+    return len(np.unique(sale_ids)), len(affected)
@@ -0,0 +1,23 @@
+# apps/ai/management/commands/build_related_products.py
+from django.core.management.base import BaseCommand
+
+from startapps.machin_learning.cooccurrence import DEFAULT_TOP_K, refresh_bought_together
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza los "comprados juntos" de /products/<id>/related/ con las ventas '
+        'completadas desde la última corrida (o desde cero con --full).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                            help='Vecinos guardados por producto.')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignora el estado guardado y procesa todas las ventas.')
+
+    def handle(self, *args, **options):
+        sales, products = refresh_bought_together(top_k=options['top_k'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Ventas procesadas: {sales}. Productos actualizados: {products}."
+        ))
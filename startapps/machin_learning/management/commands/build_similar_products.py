@@ -0,0 +1,24 @@
+# apps/ai/management/commands/build_similar_products.py
+from django.core.management.base import BaseCommand
+
+from startapps.machin_learning.similarity import DEFAULT_TOP_N, rebuild_similar, refresh_similar
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza los productos similares (TF-IDF) de /products/<id>/similar/ con los '
+        'productos modificados desde la última corrida (o desde cero con --full).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=DEFAULT_TOP_N,
+                            help='Vecinos guardados por producto.')
+        parser.add_argument('--full', action='store_true',
+                            help='Vuelve a ajustar el vocabulario y recalcula todo el catálogo.')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            count = rebuild_similar(top_n=options['top_n'])
+        else:
+            count = refresh_similar(top_n=options['top_n'])
+        self.stdout.write(self.style.SUCCESS(f"Productos actualizados: {count}."))
@@ -0,0 +1,62 @@
+# apps/ai/neighbors.py
+"""
+Utilidades comunes de los trabajos de recomendación: elegir los top-K
+vecinos de cada fila de una matriz dispersa y guardarlos en ProductNeighbor.
+"""
+import numpy as np
+from django.db import transaction
+
+from startapps.catalogo.cache import bump_catalog_version
+from startapps.catalogo.models import ProductNeighbor
+
+WRITE_BATCH_SIZE = 2000
+
+
+def top_k_by_row(matrix, rows, k, labels=None):
+    """
+    matrix: csr_matrix cuyas columnas son ids de producto.
+    Devuelve {id: [(columna, valor), ...]} con los k valores más altos de
+    cada fila pedida, de mayor a menor y sin el propio producto. El id de
+    la fila es 'labels[fila]' o, sin labels, la fila misma (matriz cuadrada).
+    """
+    result = {}
+    for row in rows:
+        label = int(labels[row]) if labels is not None else int(row)
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        columns = matrix.indices[start:end]
+        values = matrix.data[start:end]
+        keep = (columns != label) & (values > 0)
+        columns, values = columns[keep], values[keep]
+        if len(values) > k:
+            best = np.argpartition(-values, k - 1)[:k]
+            columns, values = columns[best], values[best]
+        # Mayor valor primero; a igual valor, el id menor (orden estable)
+        order = np.lexsort((columns, -values))
+        result[label] = [(int(columns[i]), float(values[i])) for i in order]
+    return result
+
+
+def store_neighbors(kind, neighbors_by_product, replace_all=False):
+    """
+    Reemplaza los vecinos de 'kind' de los productos indicados (o todos los
+    de 'kind' con replace_all=True).
+    neighbors_by_product: {product_id: [(neighbor_id, score), ...]} ya ordenado.
+    """
+    product_ids = list(neighbors_by_product)
+    rows = [
+        ProductNeighbor(product_id=pk, neighbor_id=neighbor_id, kind=kind, rank=rank, score=score)
+        for pk, neighbors in neighbors_by_product.items()
+        for rank, (neighbor_id, score) in enumerate(neighbors, start=1)
+    ]
+    with transaction.atomic():
+        if replace_all:
+            ProductNeighbor.objects.filter(kind=kind).delete()
+            product_ids = []
+        for start in range(0, len(product_ids), WRITE_BATCH_SIZE):
+            ProductNeighbor.objects.filter(
+                kind=kind, product_id__in=product_ids[start:start + WRITE_BATCH_SIZE]
+            ).delete()
+        ProductNeighbor.objects.bulk_create(rows, batch_size=WRITE_BATCH_SIZE)
+        # Las respuestas de /related/ y /similar/ dependen de esta tabla (ETags)
+        transaction.on_commit(bump_catalog_version)
+    return len(rows)
@@ -0,0 +1,187 @@
+# apps/ai/similarity.py
+"""
+Productos similares por contenido (nombre, marca, categoría y descripción)
+con TF-IDF de scikit-learn y similitud coseno. Sirve para productos nuevos,
+que todavía no tienen ventas para los "comprados juntos".
+
+El estado (vectorizador, matriz TF-IDF con una fila por id de producto,
+vecinos actuales, hash del texto y marca de agua sobre Product.updated_at)
+se guarda con joblib. Una corrida incremental:
+  1. re-vectoriza los productos cuyo texto cambió y quita los eliminados;
+  2. recalcula completos a esos productos y a los que los tenían como vecino;
+  3. al resto le agrega como candidatos los productos cambiados.
+El vocabulario y los IDF se fijan en la reconstrucción completa (--full).
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from startapps.catalogo.models import Product, ProductNeighbor
+from .neighbors import store_neighbors, top_k_by_row
+
+STATE_PATH = getattr(
+    settings, 'SIMILARITY_STATE_PATH',
+    os.path.join(os.path.dirname(__file__), 'data/similarity.joblib'),
+)
+DEFAULT_TOP_N = 10
+MIN_SIMILARITY = 0.05
+BATCH_SIZE = 500
+# Ver cooccurrence.SAFETY_LAG: se re-leen los últimos cambios en la próxima
+# corrida (los que no cambiaron el texto se descartan por el hash)
+SAFETY_LAG = timedelta(minutes=1)
+
+
+def product_texts(queryset):
+    """ {id: texto}; el nombre se repite para que pese más que la descripción. """
+    rows = queryset.values_list('id', 'name', 'brand__name', 'category__name', 'description')
+    return {
+        pk: ' '.join(part for part in (name, name, brand, category, description) if part)
+        for pk, name, brand, category, description in rows.iterator(chunk_size=5000)
+    }
+
+
+def _hash(text):
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def _rows_matrix(ids, vectors, size):
+    """ Ubica cada fila de 'vectors' en la fila 'id' de una matriz de 'size' filas. """
+    placement = sparse.csr_matrix(
+        (np.ones(len(ids)), (np.asarray(ids), np.arange(len(ids)))), shape=(size, len(ids))
+    )
+    return (placement @ vectors).tocsr()
+
+
+def _resize(matrix, rows):
+    if matrix.shape[0] >= rows:
+        return matrix
+    matrix = matrix.copy()
+    matrix.resize((rows, matrix.shape[1]))
+    return matrix
+
+
+def similar_rows(matrix, ids, top_n):
+    """ Top-N por coseno (las filas TF-IDF ya vienen normalizadas L2). """
+    result = {}
+    ids = np.asarray(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        similarities = (matrix[batch] @ matrix.T).tocsr()
+        similarities.data[similarities.data < MIN_SIMILARITY] = 0
+        result.update(top_k_by_row(similarities, range(len(batch)), top_n, labels=batch))
+    return result
+
+
+def load_state(path=STATE_PATH):
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def save_state(state, path=STATE_PATH):
+    tmp_path = f"{path}.tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def rebuild_similar(top_n=DEFAULT_TOP_N, path=STATE_PATH):
+    """ Ajusta el vectorizador con todo el catálogo y recalcula todos los vecinos. """
+    watermark = timezone.now() - SAFETY_LAG
+    texts = product_texts(Product.objects.all())
+    if not texts:
+        return 0
+    ids = list(texts)
+    vectorizer = TfidfVectorizer(strip_accents='unicode', sublinear_tf=True)
+    matrix = _rows_matrix(ids, vectorizer.fit_transform(texts.values()), max(ids) + 1)
+
+    neighbors = similar_rows(matrix, ids, top_n)
+    store_neighbors(ProductNeighbor.Kind.SIMILAR, neighbors, replace_all=True)
+    save_state({
+        'vectorizer': vectorizer,
+        'matrix': matrix,
+        'neighbors': neighbors,
+        'hashes': {pk: _hash(text) for pk, text in texts.items()},
+        'watermark': watermark,
+        'top_n': top_n,
+    }, path)
+    return len(neighbors)
+
+
+def refresh_similar(top_n=DEFAULT_TOP_N, path=STATE_PATH):
+    """
+    Actualiza los vecinos con los productos modificados desde la última
+    corrida. Sin estado guardado (o con otro top_n) hace la reconstrucción
+    completa. Devuelve la cantidad de productos cuyos vecinos se reescribieron.
+    """
+    state = load_state(path)
+    if state is None or state['top_n'] != top_n:
+        return rebuild_similar(top_n, path)
+
+    watermark = timezone.now() - SAFETY_LAG
+    hashes, neighbors = state['hashes'], state['neighbors']
+    candidates = product_texts(Product.objects.filter(updated_at__gt=state['watermark']))
+    changed = {pk: text for pk, text in candidates.items() if hashes.get(pk) != _hash(text)}
+    alive = set(Product.objects.values_list('id', flat=True))
+    deleted = [pk for pk in hashes if pk not in alive]
+
+    if not changed and not deleted:
+        state['watermark'] = watermark
+        save_state(state, path)
+        return 0
+
+    # 1. Filas de la matriz: fuera las eliminadas y las que cambiaron, y se
+    #    agregan los vectores nuevos
+    changed_ids = list(changed)
+    matrix = _resize(state['matrix'], max([*changed_ids, state['matrix'].shape[0] - 1]) + 1)
+    keep = np.ones(matrix.shape[0])
+    keep[changed_ids + deleted] = 0
+    vectors = state['vectorizer'].transform(changed.values())
+    matrix = (sparse.diags(keep) @ matrix).tocsr()
+    if changed_ids:
+        matrix = matrix + _rows_matrix(changed_ids, vectors, matrix.shape[0])
+
+    # 2. Recalculo completo: los cambiados y quienes los tenían como vecino
+    #    (su puntaje pudo bajar, y el que lo reemplace no se conoce)
+    touched = set(changed_ids) | set(deleted)
+    full = set(changed_ids) | {
+        pk for pk, items in neighbors.items()
+        if pk in alive and any(neighbor in touched for neighbor, _ in items)
+    }
+    updated = similar_rows(matrix, sorted(full), top_n)
+
+    # 3. Para el resto, los cambiados solo pueden entrar a su top-N
+    if changed_ids:
+        similarities = (matrix[changed_ids] @ matrix.T).T.tocsr()
+        for pk in np.flatnonzero(np.diff(similarities.indptr)).tolist():
+            if pk in full or pk not in alive:
+                continue
+            start, end = similarities.indptr[pk], similarities.indptr[pk + 1]
+            new = [
+                (changed_ids[column], float(value))
+                for column, value in zip(similarities.indices[start:end], similarities.data[start:end])
+                if value >= MIN_SIMILARITY
+            ]
+            if not new:
+                continue
+            current = neighbors.get(pk, [])
+            merged = sorted(current + new, key=lambda item: (-item[1], item[0]))[:top_n]
+            if merged != current:
+                updated[pk] = merged
+
+    for pk in deleted:
+        hashes.pop(pk, None)
+        neighbors.pop(pk, None)
+    for pk, text in changed.items():
+        hashes[pk] = _hash(text)
+    neighbors.update(updated)
+
+    # Los vecinos de los productos eliminados ya se fueron por el CASCADE
+    store_neighbors(ProductNeighbor.Kind.SIMILAR, updated)
+    state.update(matrix=matrix, watermark=watermark)
+    save_state(state, path)
+    return len(updated)
@@ -0,0 +1,186 @@
+# apps/sales/management/commands/explain_filter_indexes.py
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from startapps.catalogo.models import Category, Product, Warranty, WarrantyProvider
+from startapps.notas_ventas.models import ActivatedWarranty, Sale, SaleDetail
+
+# Índices de los filtros y órdenes de los listados (migraciones
+# catalogo 0015 y notas_ventas 0003)
+FILTER_INDEXES = {
+    Product: ('product_cat_price_idx', 'product_price_idx', 'product_name_idx'),
+    Sale: ('sale_user_completed_idx', 'sale_status_created_idx', 'sale_created_idx', 'sale_total_amount_idx'),
+    ActivatedWarranty: ('warranty_user_expiration_idx',),
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def _explicit_created_at():
+    # bulk_create aplica auto_now_add; para sembrar fechas repartidas se apaga un momento
+    field = Sale._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra el plan (EXPLAIN) de las consultas de los filtros del catálogo y de "
+        "ventas sin y con los índices compuestos/parciales. Siembra datos de prueba y "
+        "quita los índices dentro de una transacción que se revierte al final "
+        "(en PostgreSQL bloquea las tablas mientras corre: usar en desarrollo/staging)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--sales', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['products'], options['users'], options['sales'])
+                queries = self._queries()
+                self._drop_indexes()
+                before = self._explain(queries)
+                self._create_indexes()
+                after = self._explain(queries)
+                for title in queries:
+                    self.stdout.write(self.style.MIGRATE_HEADING(title))
+                    self.stdout.write(f"  antes:\n{before[title]}")
+                    self.stdout.write(f"  después:\n{after[title]}\n")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    # --- Datos de prueba ---
+
+    def _seed(self, products, users, sales):
+        rng = random.Random(365)
+        provider = WarrantyProvider.objects.create(name="explain-provider")
+        warranty = Warranty.objects.create(provider=provider, title="explain", terms="", duration_days=365)
+        roots = [Category.objects.create(name=f"explain-root-{i}") for i in range(5)]
+        categories = roots + [
+            Category.objects.create(name=f"explain-child-{i}", parent=roots[i % 5]) for i in range(45)
+        ]
+        catalog = Product.objects.bulk_create([
+            Product(
+                name=f"Producto {rng.randint(0, 10 ** 6)}",
+                price=Decimal(rng.randint(100, 500000)) / 100,
+                stock=rng.randint(0, 100),
+                category=rng.choice(categories),
+                warranty=warranty,
+            )
+            for _ in range(products)
+        ], batch_size=2000)
+
+        User = get_user_model()
+        customers = User.objects.bulk_create([
+            User(email=f"explain-{i}@example.com", first_name="Cliente", last_name=str(i))
+            for i in range(users)
+        ], batch_size=2000)
+
+        now = timezone.now()
+        statuses = [Sale.SaleStatus.COMPLETED] * 8 + [Sale.SaleStatus.PENDING, Sale.SaleStatus.FAILED]
+        with _explicit_created_at():
+            orders = Sale.objects.bulk_create([
+                Sale(
+                    user=rng.choice(customers),
+                    total_amount=Decimal(rng.randint(100, 1000000)) / 100,
+                    status=rng.choice(statuses),
+                    created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 730)),
+                )
+                for _ in range(sales)
+            ], batch_size=2000)
+
+        details, warranties = [], []
+        for sale in orders:
+            product = rng.choice(catalog)
+            details.append(SaleDetail(sale=sale, product=product, quantity=1, price_at_purchase=product.price))
+            if sale.status == Sale.SaleStatus.COMPLETED and rng.random() < 0.3:
+                warranties.append(ActivatedWarranty(
+                    user_id=sale.user_id, product=product, sale=sale, warranty_template=warranty,
+                    expiration_date=(sale.created_at + timedelta(days=365)).date(),
+                ))
+        SaleDetail.objects.bulk_create(details, batch_size=2000)
+        ActivatedWarranty.objects.bulk_create(warranties, batch_size=2000)
+        self._analyze()
+
+    # --- Consultas (las mismas formas que arman las vistas) ---
+
+    def _queries(self):
+        category = Category.objects.filter(name__startswith='explain-child-').first()
+        user = Sale.objects.filter(user__email__startswith='explain-').values_list('user', flat=True).first()
+        since = timezone.now() - timedelta(days=30)
+        page = 25
+        return {
+            'ProductViewSet ?category=&price__gte=&price__lte=':
+                Product.objects.filter(category=category, price__gte=100, price__lte=500).order_by('id')[:page],
+            'ProductViewSet ?category=&ordering=price':
+                Product.objects.filter(category=category).order_by('price', 'id')[:page],
+            'ProductViewSet ?price__lte=&ordering=-price':
+                Product.objects.filter(price__lte=1000).order_by('-price', '-id')[:page],
+            'ProductViewSet ?ordering=name':
+                Product.objects.order_by('name', 'id')[:page],
+            'MyPurchasesListView':
+                Sale.objects.filter(user=user, status=Sale.SaleStatus.COMPLETED).order_by('-created_at', '-id')[:page],
+            'AdminSaleListView ?status=':
+                Sale.objects.filter(status=Sale.SaleStatus.PENDING).order_by('-created_at', '-id')[:page],
+            'AdminSaleListView ?fecha_inicio=&fecha_fin=':
+                Sale.objects.filter(created_at__gte=since, created_at__lte=timezone.now())
+                .order_by('-created_at', '-id')[:page],
+            'AdminSaleListView ?monto_min=&monto_max=':
+                Sale.objects.filter(total_amount__gte=100, total_amount__lte=110).order_by('-created_at', '-id')[:page],
+            'Ventas completadas desde una fecha (cooccurrence/popularity)':
+                Sale.objects.filter(status=Sale.SaleStatus.COMPLETED, created_at__gt=since).values('id'),
+            'MyWarrantiesListView':
+                ActivatedWarranty.objects.filter(user=user).order_by('expiration_date')[:page],
+        }
+
+    def _explain(self, queries):
+        return {
+            title: '\n'.join(f"    {line}" for line in queryset.explain().splitlines())
+            for title, queryset in queries.items()
+        }
+
+    # --- Índices ---
+
+    def _indexes(self):
+        for model, names in FILTER_INDEXES.items():
+            for index in model._meta.indexes:
+                if index.name in names:
+                    yield model, index
+
+    def _execute(self, statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(str(statement))
+        self._analyze()
+
+    def _drop_indexes(self):
+        quote = connection.ops.quote_name
+        self._execute(f"DROP INDEX {quote(index.name)}" for _, index in self._indexes())
+
+    def _create_indexes(self):
+        # Solo se arma el SQL (sin entrar al schema editor, que en SQLite no
+        # se puede usar dentro de una transacción)
+        editor = connection.schema_editor()
+        self._execute(index.create_sql(model, editor) for model, index in self._indexes())
+
+    def _analyze(self):
+        # Estadísticas al día para que el planificador elija con los datos sembrados
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
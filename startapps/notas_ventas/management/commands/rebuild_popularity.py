@@ -0,0 +1,23 @@
+# apps/sales/management/commands/rebuild_popularity.py
+from django.core.management.base import BaseCommand
+
+from startapps.notas_ventas.popularity import rebase_popularity, rebuild_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula Product.popularity_score a partir de todas las ventas completadas. '
+        'Con --rebase-only solo mueve la época a hoy y reescala los puntajes guardados '
+        '(para correr periódicamente y que los pesos no crezcan sin límite).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebase-only', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['rebase_only']:
+            factor = rebase_popularity()
+            self.stdout.write(self.style.SUCCESS(f"Época movida a hoy; puntajes multiplicados por {factor:.3g}."))
+            return
+        count = rebuild_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Productos con ventas: {count}."))
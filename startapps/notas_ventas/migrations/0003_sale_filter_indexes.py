@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notas_ventas', '0002_remove_sale_product_remove_sale_quantity_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('status', 'COMPLETED')), fields=['user', '-created_at', '-id'], name='sale_user_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='sale_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['-created_at', '-id'], name='sale_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['total_amount'], name='sale_total_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activatedwarranty',
+            index=models.Index(fields=['user', 'expiration_date'], name='warranty_user_expiration_idx'),
+        ),
+    ]
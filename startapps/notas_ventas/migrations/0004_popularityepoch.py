@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:00
+
+import datetime
+
+from django.db import migrations, models
+
+
+def create_epoch(apps, schema_editor):
+    # La época fija con la que se calcularon los puntajes existentes
+    PopularityEpoch = apps.get_model('notas_ventas', 'PopularityEpoch')
+    PopularityEpoch.objects.create(pk=1, epoch=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notas_ventas', '0003_sale_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_epoch, migrations.RunPython.noop),
+    ]
@@ -26,6 +26,23 @@ class Sale(models.Model):
     )
     stripe_payment_intent_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Mis compras: solo las completadas del usuario, más nuevas primero
+            # (parcial: las pendientes/fallidas no ocupan lugar en el índice)
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(status='COMPLETED'),
+                name='sale_user_completed_idx',
+            ),
+            # Listado de admin (orden por defecto), con o sin ?status= y
+            # rangos de fecha; también las ventas completadas desde una fecha
+            models.Index(fields=['status', '-created_at', '-id'], name='sale_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='sale_created_idx'),
+            # ?monto_min= / ?monto_max=
+            models.Index(fields=['total_amount'], name='sale_total_amount_idx'),
+        ]
     
     def __str__(self):
         return f"Venta {self.id} - {self.user.email} - {self.status}"
@@ -53,6 +70,12 @@ class ActivatedWarranty(models.Model):
     start_date = models.DateField(auto_now_add=True)
     expiration_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            # Mis garantías: las del usuario, las que vencen antes primero
+            models.Index(fields=['user', 'expiration_date'], name='warranty_user_expiration_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # Lógica de activación:
         # Al guardar, calcula la fecha de expiración
@@ -64,3 +87,11 @@ class ActivatedWarranty(models.Model):
     def __str__(self):
         return f"Garantía de {self.product.name} para {self.user.email} (Vence: {self.expiration_date})"
 
+
+
+# Época del puntaje de popularidad (una sola fila; ver popularity.py)
+class PopularityEpoch(models.Model):
+    epoch = models.DateTimeField()
+
+    def __str__(self):
+        return f"Época de popularidad: {self.epoch:%Y-%m-%d}"
@@ -0,0 +1,99 @@
+# apps/sales/popularity.py
+"""
+Popularidad de productos con decaimiento hacia adelante ("forward decay").
+
+Cada unidad vendida suma 2 ** ((fecha_venta - época) / HALF_LIFE) al
+puntaje del producto. Como todos los pesos crecen al mismo ritmo, ordenar
+por la suma equivale a ordenar por ventas con decaimiento exponencial
+(vida media HALF_LIFE) a la fecha de hoy, sin tener que recalcular nada
+con el paso del tiempo: cada venta solo suma, con un UPDATE ... F().
+
+Los pesos crecen sin límite (con 30 días de vida media, x4096 por año; el
+float desborda pasado 2 ** 1024), así que la época (PopularityEpoch) se
+mueve hacia adelante de vez en cuando: rebase_popularity() la lleva a hoy
+y reescala los puntajes guardados por el mismo factor, sin cambiar el
+orden. rebuild_popularity() también recalcula con la época en hoy.
+Correr 'rebuild_popularity --rebase-only' cada pocos meses (cron) basta.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from startapps.catalogo.cache import bump_catalog_version
+from startapps.catalogo.models import Product
+from .models import PopularityEpoch, Sale, SaleDetail
+
+# Época inicial (con la que se calcularon los primeros puntajes)
+DEFAULT_POPULARITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+POPULARITY_HALF_LIFE = timedelta(days=getattr(settings, 'POPULARITY_HALF_LIFE_DAYS', 30))
+
+
+def _epoch(lock=False):
+    queryset = PopularityEpoch.objects.select_for_update() if lock else PopularityEpoch.objects
+    state, _ = queryset.get_or_create(pk=1, defaults={'epoch': DEFAULT_POPULARITY_EPOCH})
+    return state
+
+
+def sale_weight(when, epoch):
+    """ Peso de una unidad vendida en 'when' (se duplica cada vida media). """
+    return math.pow(2.0, (when - epoch) / POPULARITY_HALF_LIFE)
+
+
+def record_sale(sale, items):
+    """
+    Suma una venta completada. items: iterable de (product_id, cantidad).
+    Se llama con los productos ya bloqueados (select_for_update) en la
+    transacción de la venta: así no se cruza con un rebase_popularity(),
+    que actualiza todas las filas de Product junto con la época.
+    """
+    quantities = defaultdict(int)
+    for product_id, quantity in items:
+        quantities[product_id] += quantity
+    weight = sale_weight(sale.created_at, _epoch().epoch)
+    for product_id, quantity in quantities.items():
+        Product.objects.filter(pk=product_id).update(
+            popularity_score=F('popularity_score') + weight * quantity
+        )
+
+
+def rebase_popularity(new_epoch=None):
+    """
+    Mueve la época a 'new_epoch' (por defecto, ahora) y multiplica los
+    puntajes por 2 ** ((época anterior - nueva) / HALF_LIFE). Devuelve el factor.
+    """
+    new_epoch = new_epoch or timezone.now()
+    with transaction.atomic():
+        state = _epoch(lock=True)
+        factor = math.pow(2.0, (state.epoch - new_epoch) / POPULARITY_HALF_LIFE)
+        # Todas las filas (también las en 0), para esperar a las ventas en curso
+        Product.objects.update(popularity_score=F('popularity_score') * factor)
+        state.epoch = new_epoch
+        state.save(update_fields=['epoch'])
+    return factor
+
+
+def rebuild_popularity():
+    """ Recalcula todos los puntajes desde las ventas completadas, con la época en hoy. """
+    epoch = timezone.now()
+    scores = defaultdict(float)
+    details = SaleDetail.objects.filter(
+        sale__status=Sale.SaleStatus.COMPLETED
+    ).values_list('product_id', 'quantity', 'sale__created_at')
+    for product_id, quantity, created_at in details.iterator(chunk_size=5000):
+        scores[product_id] += sale_weight(created_at, epoch) * quantity
+
+    with transaction.atomic():
+        state = _epoch(lock=True)
+        state.epoch = epoch
+        state.save(update_fields=['epoch'])
+        Product.objects.exclude(popularity_score=0).update(popularity_score=0)
+        products = [Product(pk=pk, popularity_score=score) for pk, score in scores.items()]
+        Product.objects.bulk_update(products, ['popularity_score'], batch_size=1000)
+        # El orden ?ordering=popularity cambia: invalida los ETags del catálogo
+        transaction.on_commit(bump_catalog_version)
+    return len(products)
@@ -9,8 +9,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 from .filters import SaleFilter
+from .popularity import record_sale
 
 from rest_framework.pagination import PageNumberPagination
+from smartsales365.pagination import KeysetPagination
 
 from startapps.catalogo.models import Product, Warranty
 from .models import Sale, SaleDetail, ActivatedWarranty, ActivatedWarranty
@@ -150,6 +152,9 @@ class StripeWebhookView(APIView):
                         product.stock -= item['quantity']
                         product.save()
 
+                    # E. Sumar la venta a la popularidad (UPDATE ... F(), sin carreras)
+                    record_sale(sale, [(item['id'], item['quantity']) for item in cart])
+
             except Exception as e:
                 print(f"Error procesando webhook: {e}")
                 return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -163,13 +168,15 @@ class MyPurchasesListView(generics.ListAPIView):
     """ Devuelve una lista de todas las compras del usuario logueado """
     permission_classes = [IsAuthenticated]
     serializer_class = SaleSerializer
+    pagination_class = KeysetPagination # ?cursor= activa la paginación por cursor
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         # Solo muestra ventas completadas del usuario actual
         return Sale.objects.filter(
             user=self.request.user, 
             status=Sale.SaleStatus.COMPLETED
-        ).order_by('-created_at')
+        ).order_by('-created_at', '-id')
 
 class ReceiptDetailView(generics.RetrieveAPIView):
     """ Devuelve una "Nota de Compra" detallada (un recibo) """
@@ -211,9 +218,11 @@ class AdminSaleListView(generics.ListAPIView):
 
     filter_backends = [DjangoFilterBackend]
     filterset_class = SaleFilter
+    pagination_class = KeysetPagination # ?cursor= activa la paginación por cursor
+    keyset_ordering = ('-created_at', '-id')
 
     # --- 2. ASEGÚRATE DE QUE ESTA LÍNEA EXISTA ---
-    queryset = Sale.objects.all().order_by('-created_at').prefetch_related(
+    queryset = Sale.objects.all().order_by('-created_at', '-id').prefetch_related(
         'user',
         'details__product',
         'activated_warranties'